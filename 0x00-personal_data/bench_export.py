@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the batched export against per row logging, on a local SQLite
+stand-in for the users table of get_db()
+"""
+import io
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from functools import partial
+
+from filtered_logger import (MESSAGE, RedactingFormatter, PII_FIELDS,
+                             export_users, export_users_parallel)
+
+
+def make_db(rows: int, path: str = ":memory:") -> sqlite3.Connection:
+    """
+    Creates a users table with the columns main() expects
+    """
+    db: sqlite3.Connection = sqlite3.connect(path)
+    db.execute("CREATE TABLE users (name TEXT, email TEXT, phone TEXT, "
+               "ssn TEXT, password TEXT, ip TEXT, last_login TEXT, "
+               "user_agent TEXT)")
+    db.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                   (("user{}".format(i), "user{}@hbtn.io".format(i),
+                     "555-{:04d}".format(i % 10000), "123-45-6789",
+                     "hash{}".format(i), "10.0.0.{}".format(i % 256),
+                     "2019-11-14 06:14:24", "Mozilla/5.0")
+                    for i in range(rows)))
+    db.commit()
+    return db
+
+
+def per_row(db: sqlite3.Connection, sink: io.StringIO) -> None:
+    """
+    The main() loop: one logger call per row
+    """
+    logger: logging.Logger = logging.getLogger("bench_export")
+    logger.handlers = []
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler: logging.StreamHandler = logging.StreamHandler(sink)
+    handler.setFormatter(RedactingFormatter(list(PII_FIELDS)))
+    logger.addHandler(handler)
+    cursor = db.cursor()
+    cursor.execute("SELECT * FROM users;")
+    for row in cursor:
+        logger.info(MESSAGE, *row[:8])
+    cursor.close()
+
+
+if __name__ == "__main__":
+    rows: int = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    db: sqlite3.Connection = make_db(rows)
+    start: float = time.perf_counter()
+    per_row(db, io.StringIO())
+    elapsed: float = time.perf_counter() - start
+    print("{:>12}: {:10.0f} rows/s".format("per row", rows / elapsed))
+    for batch_size in (100, 1000, 10000):
+        start = time.perf_counter()
+        export_users(db, io.StringIO(), batch_size)
+        elapsed = time.perf_counter() - start
+        print("{:>12}: {:10.0f} rows/s".format(
+            "batch {}".format(batch_size), rows / elapsed))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path: str = os.path.join(tmp_dir, "users.db")
+        make_db(rows, path).close()
+        for workers in (1, 2, 4):
+            start = time.perf_counter()
+            export_users_parallel(workers, sink=io.StringIO(),
+                                  connect=partial(sqlite3.connect, path))
+            elapsed = time.perf_counter() - start
+            print("{:>12}: {:10.0f} rows/s".format(
+                "{} workers".format(workers), rows / elapsed))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of filter_datum against the former one re.sub per field loop,
+and of filter_datum_many against calling filter_datum line by line
+"""
+import re
+import sys
+import time
+import timeit
+from collections import deque
+from typing import Iterator, List
+
+from filtered_logger import PII_FIELDS, filter_datum, filter_datum_many
+
+
+def filter_datum_loop(fields: List[str],
+                      redaction: str,
+                      message: str,
+                      separator: str) -> str:
+    """
+    Reference implementation: one re.sub per field, pattern rebuilt per call
+    """
+    for field in fields:
+        message = re.sub(r"{}=[^{}]+".format(field, separator),
+                         r"{}={}".format(field, redaction), message)
+    return message
+
+
+def make_message(fields: List[str], separator: str = ";") -> str:
+    """
+    Builds a log line holding one value per field plus some non PII ones
+    """
+    pairs: List[str] = ["{}=value_{}".format(field, i)
+                        for i, field in enumerate(fields)]
+    pairs += ["ip=10.0.0.{}".format(i) for i in range(5)]
+    return separator.join(pairs) + separator
+
+
+def bench(fields: List[str], number: int = 2000) -> None:
+    """
+    Prints the per call cost of both implementations for the given fields
+    """
+    message: str = make_message(fields)
+    assert filter_datum(fields, "***", message, ";") == \
+        filter_datum_loop(fields, "***", message, ";")
+    for name, func in (("loop", filter_datum_loop),
+                       ("compiled", filter_datum)):
+        seconds: float = min(timeit.repeat(
+            lambda: func(fields, "***", message, ";"),
+            number=number, repeat=3))
+        print("{:>4} fields {:>9}: {:10.2f} us/call".format(
+            len(fields), name, seconds / number * 1e6))
+
+
+def lines(count: int) -> Iterator[str]:
+    """
+    Lazily generates count distinct log lines
+    """
+    for i in range(count):
+        yield "name=user{0}; email=user{0}@hbtn.io; phone=555-{0}; " \
+              "ssn=123-45-6789; password=hash{0}; ip=10.0.0.1;".format(i)
+
+
+def bench_many(count: int) -> None:
+    """
+    Prints the per line cost of filter_datum_many and of a filter_datum
+    call per line, over count lines never held in memory at once
+    """
+    fields: List[str] = list(PII_FIELDS)
+    runs = (("per call", lambda: (filter_datum(fields, "***", line, ";")
+                                  for line in lines(count))),
+            ("many", lambda: filter_datum_many(fields, "***", lines(count),
+                                               ";")))
+    for name, run in runs:
+        start: float = time.perf_counter()
+        deque(run(), maxlen=0)
+        elapsed: float = time.perf_counter() - start
+        print("{:>10} lines {:>9}: {:10.0f} ns/line".format(
+            count, name, elapsed / count * 1e9))
+
+
+if __name__ == "__main__":
+    if "--many" in sys.argv[1:]:
+        for count in (1000, 100000, 10000000):
+            bench_many(count)
+        sys.exit(0)
+    bench(list(PII_FIELDS))
+    bench(["field_{}".format(i) for i in range(50)], number=500)
+    bench(["field_{}".format(i) for i in range(300)], number=50)
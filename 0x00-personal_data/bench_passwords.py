@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness of the project's password hashing schemes
+
+Measures hash and verify latency distributions and throughput, serially
+and under concurrent threads, for:
+  - sha256: User.password of 0x02-Session_authentication/models/user.py
+  - encrypt_password: bcrypt of encrypt_password.py, per cost factor
+  - auth: bcrypt of 0x03-user_authentication_service/auth.py
+and prints a table for capacity planning. Schemes whose module cannot be
+imported (missing dependency) are reported and skipped.
+
+Usage: ./bench_passwords.py [--rounds 4,10,12] [--ops 20] [--threads 4]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+import bcrypt
+
+import encrypt_password
+
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD: str = "H0lbertonSchool98!"
+
+
+def sha256_scheme() -> Tuple[Callable, Callable]:
+    """
+    User.password setter and User.is_valid_password
+    """
+    sys.path.insert(0, os.path.join(ROOT, "0x02-Session_authentication"))
+    from models.user import User
+    user = User()
+
+    def hash_(password: str) -> object:
+        """Hashes through the User.password setter of a prebuilt User"""
+        user.password = password
+        return user._password
+
+    def verify(hashed: str, password: str) -> bool:
+        """Verifies through User.is_valid_password"""
+        user._password = hashed
+        return user.is_valid_password(password)
+    return hash_, verify
+
+
+def encrypt_password_scheme(rounds: int) -> Tuple[Callable, Callable]:
+    """
+    encrypt_password.hash_password and is_valid at the given cost
+    """
+    def hash_(password: str) -> bytes:
+        """Hashes at the benchmarked cost"""
+        encrypt_password.ROUNDS = rounds
+        return encrypt_password.hash_password(password)
+    return hash_, encrypt_password.is_valid
+
+
+def auth_scheme() -> Tuple[Callable, Callable]:
+    """
+    auth._hash_password and the bcrypt.checkpw of Auth.valid_login
+    """
+    sys.path.insert(0, os.path.join(ROOT, "0x03-user_authentication_service"))
+    from auth import _hash_password
+
+    def verify(hashed: bytes, password: str) -> bool:
+        """Verifies as Auth.valid_login does"""
+        return bcrypt.checkpw(password.encode("utf-8"), hashed)
+    return _hash_password, verify
+
+
+def latencies(func: Callable, ops: int) -> List[float]:
+    """
+    Returns the latency in ms of ops calls of func
+    """
+    result: List[float] = []
+    for _ in range(ops):
+        start: float = time.perf_counter()
+        func()
+        result.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def concurrent_throughput(func: Callable, ops: int, threads: int) -> float:
+    """
+    Returns the ops/s of ops calls of func spread over threads
+    """
+    start: float = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(func) for _ in range(ops)]:
+            future.result()
+    return ops / (time.perf_counter() - start)
+
+
+def bench(name: str, scheme: Tuple[Callable, Callable], ops: int,
+          threads: int) -> List[Dict]:
+    """
+    Measures the hash and verify operations of one scheme
+    """
+    hash_, verify = scheme
+    hashed = hash_(PASSWORD)
+    rows: List[Dict] = []
+    for operation, func in (("hash", lambda: hash_(PASSWORD)),
+                            ("verify", lambda: verify(hashed, PASSWORD))):
+        samples: List[float] = sorted(latencies(func, ops))
+        rows.append({
+            "scheme": name, "op": operation,
+            "p50": statistics.median(samples),
+            "p90": samples[int(0.9 * (len(samples) - 1))],
+            "p99": samples[int(0.99 * (len(samples) - 1))],
+            "serial": 1000 / statistics.mean(samples),
+            "threaded": concurrent_throughput(func, ops, threads)})
+    return rows
+
+
+def main(rounds: List[int], ops: int, threads: int) -> None:
+    """
+    Runs every scheme and prints the table
+    """
+    schemes: List[Tuple[str, Callable]] = [("sha256", sha256_scheme)]
+    schemes += [("encrypt_password r={}".format(r),
+                 partial(encrypt_password_scheme, r)) for r in rounds]
+    schemes.append(("auth r=12", auth_scheme))
+
+    print("{:<24} {:<6} {:>10} {:>10} {:>10} {:>12} {:>14}".format(
+        "scheme", "op", "p50 ms", "p90 ms", "p99 ms", "ops/s/core",
+        "ops/s x{}".format(threads)))
+    for name, factory in schemes:
+        try:
+            scheme: Tuple[Callable, Callable] = factory()
+        except ImportError as e:
+            print("{:<24} skipped: {}".format(name, e))
+            continue
+        sha: bool = name == "sha256"
+        for row in bench(name, scheme, ops * 50 if sha else ops, threads):
+            print("{scheme:<24} {op:<6} {p50:>10.3f} {p90:>10.3f} "
+                  "{p99:>10.3f} {serial:>12.1f} {threaded:>14.1f}"
+                  .format(**row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", default="4,10,12",
+                        help="comma separated bcrypt costs")
+    parser.add_argument("--ops", type=int, default=20,
+                        help="operations per bcrypt measurement")
+    parser.add_argument("--threads", type=int,
+                        default=encrypt_password.MAX_WORKERS)
+    args = parser.parse_args()
+    main([int(r) for r in args.rounds.split(",")], args.ops, args.threads)
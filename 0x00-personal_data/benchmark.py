@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite of the personal data logging path
+
+Runs filter_datum, RedactingFormatter.format and a user_data style logger
+over synthetic messages across a grid of message sizes, field counts,
+redaction densities and handler counts, and prints one JSON object per
+measurement: ns per record, peak transient bytes per record and blocks
+retained per record.
+
+Usage: ./benchmark.py [--records N] [--output FILE]
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from itertools import product
+from typing import Callable, Dict, List
+
+from filtered_logger import (PII_FIELDS, RedactingFormatter, filter_datum,
+                             get_logger)
+
+
+MESSAGE_SIZES: List[int] = [8, 64, 512]
+FIELD_COUNTS: List[int] = [5, 50, 300]
+DENSITIES: List[float] = [0.0, 0.25, 1.0]
+HANDLER_COUNTS: List[int] = [1, 2, 4]
+
+
+def make_fields(count: int) -> List[str]:
+    """
+    Returns the PII fields padded with synthetic ones up to count
+    """
+    return (list(PII_FIELDS) +
+            ["pii_{}".format(i) for i in range(count)])[:count]
+
+
+def make_messages(pairs: int, fields: List[str], density: float,
+                  count: int = 64) -> List[str]:
+    """
+    Builds count distinct messages of pairs key=value pairs, a density
+    fraction of them being PII fields
+    """
+    messages: List[str] = []
+    pii: int = int(round(pairs * density))
+    for n in range(count):
+        keys: List[str] = [fields[(n + i) % len(fields)] for i in range(pii)]
+        keys += ["key_{}".format(i) for i in range(pairs - pii)]
+        messages.append(";".join("{}=value_{}_{}".format(key, n, i)
+                                 for i, key in enumerate(keys)) + ";")
+    return messages
+
+
+def measure(run: Callable, records: int) -> Dict[str, float]:
+    """
+    Times run(i) over records records, then replays it under tracemalloc
+    """
+    run(0)
+    start: int = time.perf_counter_ns()
+    for i in range(records):
+        run(i)
+    elapsed: int = time.perf_counter_ns() - start
+
+    sample: int = max(1, records // 10)
+    tracemalloc.start()
+    blocks: int = sys.getallocatedblocks()
+    peak: int = 0
+    for i in range(sample):
+        tracemalloc.reset_peak()
+        base: int = tracemalloc.get_traced_memory()[0]
+        run(i)
+        peak += tracemalloc.get_traced_memory()[1] - base
+    retained: int = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+    return {"ns_per_record": elapsed / records,
+            "peak_bytes_per_record": peak / sample,
+            "blocks_retained_per_record": retained / sample}
+
+
+def make_logger(fields: List[str], handlers: int,
+                sink) -> logging.Logger:
+    """
+    Returns a user_data style logger with handlers redacting handlers
+    """
+    logger: logging.Logger = logging.getLogger("benchmark.user_data")
+    logger.handlers = []
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for _ in range(handlers):
+        handler: logging.StreamHandler = logging.StreamHandler(sink)
+        handler.setFormatter(RedactingFormatter(fields))
+        logger.addHandler(handler)
+    return logger
+
+
+def commit() -> str:
+    """
+    Returns the current git commit, or an empty string
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_suite(records: int, output) -> None:
+    """
+    Runs the whole grid and writes one JSON line per measurement
+    """
+    revision: str = commit()
+    sink = open(os.devnull, "w")
+
+    def emit(bench: str, params: Dict, result: Dict) -> None:
+        """Writes one result line"""
+        row: Dict = {"bench": bench, "commit": revision, "records": records}
+        row.update(params)
+        row.update(result)
+        output.write(json.dumps(row) + "\n")
+        output.flush()
+
+    for size, nfields, density in product(MESSAGE_SIZES, FIELD_COUNTS,
+                                          DENSITIES):
+        fields: List[str] = make_fields(nfields)
+        messages: List[str] = make_messages(size, fields, density)
+        params: Dict = {"message_pairs": size, "fields": nfields,
+                        "density": density}
+        emit("filter_datum", params, measure(
+            lambda i: filter_datum(fields, "***", messages[i % 64], ";"),
+            records))
+
+        formatter: RedactingFormatter = RedactingFormatter(fields)
+        emit("RedactingFormatter.format", params, measure(
+            lambda i: formatter.format(logging.LogRecord(
+                "user_data", logging.INFO, __file__, 0, messages[i % 64],
+                None, None)),
+            records))
+
+        for handlers in HANDLER_COUNTS:
+            logger: logging.Logger = make_logger(fields, handlers, sink)
+            emit("logger.info", dict(params, handlers=handlers), measure(
+                lambda i: logger.info(messages[i % 64]), records))
+
+    user_data: logging.Logger = logging.getLogger("user_data")
+
+    def first_get_logger(i: int) -> None:
+        """
+        Calls get_logger on the handler free logger of a first use, so
+        handlers do not pile up across calls
+        """
+        user_data.handlers = []
+        get_logger()
+
+    emit("get_logger", {}, measure(first_get_logger, records))
+    user_data.handlers = []
+    sink.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--records", type=int, default=2000,
+                        help="records per measurement")
+    parser.add_argument("--output", help="JSON lines file, stdout default")
+    args = parser.parse_args()
+    if args.output:
+        with open(args.output, "w") as out:
+            run_suite(args.records, out)
+    else:
+        run_suite(args.records, sys.stdout)
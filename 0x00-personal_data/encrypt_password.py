@@ -3,7 +3,85 @@
 This module contains the hash_password function that
 uses bcrypt to encrypt the password received
 """
+import asyncio
+import json
+import os
+import platform
+import time
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+
+MAX_WORKERS: int = min(32, os.cpu_count() or 1)
+ROUNDS: int = 12
+CALIBRATION_FILE: str = ".bcrypt_calibration.json"
+
+
+def _measure(rounds: int, samples: int = 3) -> float:
+    """
+    Returns the best time, in seconds, of hashing at the given cost.
+    """
+    salt: bytes = bcrypt.gensalt(rounds)
+    best: float = float("inf")
+    for _ in range(samples):
+        start: float = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate(target_ms: float = 250.0,
+              min_rounds: int = 10,
+              max_rounds: int = 16,
+              cache_file: Optional[str] = CALIBRATION_FILE) -> int:
+    """
+    Picks the highest bcrypt cost whose hashing time on this machine stays
+    within target_ms, and makes hash_password use it.
+
+    The time is measured at a cheap cost and extrapolated, each extra
+    round doubling it. The result is cached in cache_file per host and
+    target, so later startups skip the measurement.
+
+    Args:
+        target_ms (float): hashing latency target in milliseconds
+        min_rounds (int): lowest cost ever picked
+        max_rounds (int): highest cost ever picked
+        cache_file (Optional[str]): calibration cache, None disables it
+
+    Returns:
+        int: the chosen cost
+    """
+    global ROUNDS
+    key: dict = {"host": platform.node(), "target_ms": target_ms,
+                 "min_rounds": min_rounds, "max_rounds": max_rounds}
+    if cache_file is not None and os.path.exists(cache_file):
+        try:
+            with open(cache_file) as f:
+                cached: dict = json.load(f)
+            if all(cached.get(k) == v for k, v in key.items()):
+                ROUNDS = int(cached["rounds"])
+                return ROUNDS
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    base: int = 8
+    seconds: float = _measure(base)
+    rounds: int = min_rounds
+    while rounds < max_rounds and \
+            seconds * 2 ** (rounds + 1 - base) * 1000 <= target_ms:
+        rounds += 1
+    ROUNDS = rounds
+
+    if cache_file is not None:
+        try:
+            with open(cache_file, "w") as f:
+                json.dump(dict(key, rounds=rounds,
+                               measured_ms=seconds * 2 ** (rounds - base)
+                               * 1000), f)
+        except OSError:
+            pass
+    return ROUNDS
 
 
 def hash_password(password: str) -> bytes:
@@ -16,7 +94,7 @@ def hash_password(password: str) -> bytes:
     Returns:
         bytes: salted, hashed password
     """
-    return bcrypt.hashpw(bytes(password, "utf-8"), bcrypt.gensalt())
+    return bcrypt.hashpw(bytes(password, "utf-8"), bcrypt.gensalt(ROUNDS))
 
 
 def is_valid(hashed_password: bytes, password: str) -> bool:
@@ -31,3 +109,123 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
         bool: True if the password is valid, False otherwise
     """
     return bcrypt.checkpw(bytes(password, "utf-8"), hashed_password)
+
+
+def needs_rehash(hashed_password: bytes) -> bool:
+    """
+    Tells whether a hash was made with a lower cost than the current one.
+    Higher costs are kept, so hosts calibrated differently do not keep
+    rehashing the same passwords back and forth.
+
+    Args:
+        hashed_password (bytes): salted, hashed password
+
+    Returns:
+        bool: True if the hash cost is below ROUNDS
+    """
+    try:
+        return int(hashed_password.split(b"$")[2]) < ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def verify_and_rehash(hashed_password: bytes,
+                      password: str) -> Tuple[bool, Optional[bytes]]:
+    """
+    Validates the password and, on success with an out of date cost,
+    rehashes it so the caller can store the new hash.
+
+    Args:
+        hashed_password (bytes): salted, hashed password
+        password (str): string type password
+
+    Returns:
+        Tuple[bool, Optional[bytes]]: validity, and the new hash when the
+        stored one should be replaced
+    """
+    if not is_valid(hashed_password, password):
+        return False, None
+    if needs_rehash(hashed_password):
+        return True, hash_password(password)
+    return True, None
+
+
+def hash_passwords(passwords: Iterable[str],
+                   max_workers: Optional[int] = None) -> List[bytes]:
+    """
+    Hashes many passwords over a bounded thread pool, bcrypt releasing
+    the GIL while it hashes.
+
+    Args:
+        passwords (Iterable[str]): string type passwords
+        max_workers (Optional[int]): threads, MAX_WORKERS by default
+
+    Returns:
+        List[bytes]: salted, hashed passwords, in input order
+    """
+    with ThreadPoolExecutor(max_workers or MAX_WORKERS) as executor:
+        return list(executor.map(hash_password, passwords))
+
+
+def _is_valid_pair(pair: Tuple[bytes, str]) -> bool:
+    """
+    is_valid on a (hashed_password, password) pair.
+    """
+    return is_valid(pair[0], pair[1])
+
+
+def verify_many(pairs: Iterable[Tuple[bytes, str]],
+                max_workers: Optional[int] = None) -> List[bool]:
+    """
+    Validates many passwords over a bounded thread pool.
+
+    Args:
+        pairs (Iterable[Tuple[bytes, str]]): (hashed_password, password)
+        max_workers (Optional[int]): threads, MAX_WORKERS by default
+
+    Returns:
+        List[bool]: validity of each pair, in input order
+    """
+    with ThreadPoolExecutor(max_workers or MAX_WORKERS) as executor:
+        return list(executor.map(_is_valid_pair, pairs))
+
+
+async def hash_passwords_async(passwords: Iterable[str],
+                               max_workers: Optional[int] = None
+                               ) -> List[bytes]:
+    """
+    Awaitable hash_passwords, the event loop keeps running while the
+    thread pool hashes.
+
+    Args:
+        passwords (Iterable[str]): string type passwords
+        max_workers (Optional[int]): threads, MAX_WORKERS by default
+
+    Returns:
+        List[bytes]: salted, hashed passwords, in input order
+    """
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers or MAX_WORKERS) as executor:
+        return await asyncio.gather(*(
+            loop.run_in_executor(executor, hash_password, password)
+            for password in passwords))
+
+
+async def verify_many_async(pairs: Iterable[Tuple[bytes, str]],
+                            max_workers: Optional[int] = None
+                            ) -> List[bool]:
+    """
+    Awaitable verify_many.
+
+    Args:
+        pairs (Iterable[Tuple[bytes, str]]): (hashed_password, password)
+        max_workers (Optional[int]): threads, MAX_WORKERS by default
+
+    Returns:
+        List[bool]: validity of each pair, in input order
+    """
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers or MAX_WORKERS) as executor:
+        return await asyncio.gather(*(
+            loop.run_in_executor(executor, _is_valid_pair, pair)
+            for pair in pairs))
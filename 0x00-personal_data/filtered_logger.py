@@ -5,12 +5,117 @@ obfuscated
 """
 import os
 import re
+import argparse
+import atexit
+import gzip
+import hashlib
+import hmac
+import sys
+import time
+import queue
+import shutil
 import logging
-from typing import List, Tuple, Optional
+import logging.handlers
+import mmap
+import tempfile
+import threading
+import traceback
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import (Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Pattern,
+                    TextIO, Tuple, Optional)
 from mysql.connector.connection import MySQLConnection
 
 
 PII_FIELDS: Tuple = ("email", "ssn", "password", "name", "phone")
+MESSAGE: str = "name=%s; email=%s; phone=%s; ssn=%s; password=%s; ip=%s; \
+                    last_login=%s; user_agent=%s;"
+USERS_COLUMNS: Tuple = ("name", "email", "phone", "ssn", "password", "ip",
+                        "last_login", "user_agent")
+
+
+def _trie_pattern(node: Dict) -> str:
+    """
+    Turns a character trie of field names into a regex alternation that
+    shares common prefixes, so the matcher never retries the same prefix
+    once per field.
+
+    Args:
+        node (Dict): trie node, the "" key marks the end of a field
+
+    Returns:
+        str: regex fragment matching every field under this node
+    """
+    branches: List[str] = [re.escape(char) + _trie_pattern(child)
+                           for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    pattern: str = "(?:{})".format("|".join(branches))
+    return pattern + "?" if "" in node else pattern
+
+
+def _fields_pattern(fields: Tuple[str, ...]) -> Optional[str]:
+    """
+    Builds the prefix-trie alternation matching any of the fields.
+
+    Args:
+        fields (Tuple[str, ...]): fields to obfuscate
+
+    Returns:
+        Optional[str]: regex fragment, None when there is no field
+    """
+    trie: Dict = {}
+    for field in fields:
+        if not field:
+            continue
+        node: Dict = trie
+        for char in field:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    if not trie:
+        return None
+    return _trie_pattern(trie)
+
+
+@lru_cache(maxsize=128)
+def compile_redaction(fields: Tuple[str, ...],
+                      separator: str) -> Optional[Pattern]:
+    """
+    Compiles all fields and the separator into a single matcher, cached
+    per (fields, separator) so log calls never rebuild it.
+
+    Args:
+        fields (Tuple[str, ...]): fields to obfuscate
+        separator (str): separator of fields
+
+    Returns:
+        Optional[Pattern]: compiled matcher, None when there is no field
+    """
+    pattern: Optional[str] = _fields_pattern(fields)
+    if pattern is None:
+        return None
+    return re.compile(r"(?P<field>{})=(?P<value>[^{}]+)".format(
+        pattern, re.escape(separator)))
+
+
+@lru_cache(maxsize=128)
+def _compile_line_redaction(fields: Tuple[str, ...],
+                            separator: str) -> Optional[Pattern]:
+    """
+    Bytes variant of compile_redaction whose values stop at line ends, so
+    one scan over many UTF-8 lines matches filter_datum run on each line.
+    """
+    pattern: Optional[str] = _fields_pattern(fields)
+    if pattern is None:
+        return None
+    return re.compile(r"(?P<field>{})=[^{}\n]+".format(
+        pattern, re.escape(separator)).encode("utf-8"))
 
 
 def filter_datum(fields: List[str],
@@ -29,10 +134,117 @@ def filter_datum(fields: List[str],
     Returns:
         str: log obfuscated
     """
-    for field in fields:
-        message = re.sub(r"{}=[^{}]+".format(field, separator),
-                         r"{}={}".format(field, redaction), message)
-    return message
+    pattern: Optional[Pattern] = compile_redaction(tuple(fields), separator)
+    if pattern is None:
+        return message
+    return pattern.sub(r"\g<field>={}".format(redaction), message)
+
+
+def filter_datum_many(fields: List[str],
+                      redaction: str,
+                      messages: Iterable[str],
+                      separator: str) -> Iterator[str]:
+    """
+    Lazily yields each message obfuscated, the matcher and replacement
+    being resolved once for the whole batch instead of once per message
+
+    Args:
+        fields (List[str]): fields to obfuscate
+        redaction (str): string to replace the field
+        messages (Iterable[str]): logs to obfuscate
+        separator (str): separator of fields
+
+    Returns:
+        Iterator[str]: logs obfuscated, in input order
+    """
+    pattern: Optional[Pattern] = compile_redaction(tuple(fields), separator)
+    if pattern is None:
+        yield from messages
+        return
+    sub: Callable = pattern.sub
+    template: str = r"\g<field>={}".format(redaction)
+    for message in messages:
+        yield sub(template, message)
+
+
+def _redact_chunk(path: str,
+                  start: int,
+                  end: int,
+                  fields: Tuple[str, ...],
+                  redaction: str,
+                  separator: str) -> bytes:
+    """
+    Process pool worker: memory-maps the file and redacts the lines
+    between start and end.
+    """
+    pattern: Optional[Pattern] = _compile_line_redaction(fields, separator)
+    with open(path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        chunk: bytes = mm[start:end]
+    if pattern is None:
+        return chunk
+    return pattern.sub(r"\g<field>={}".format(redaction).encode("utf-8"),
+                       chunk)
+
+
+def redact_file(input_path: str,
+                output_path: str,
+                fields: Tuple[str, ...] = PII_FIELDS,
+                redaction: str = "***",
+                separator: str = ";",
+                workers: Optional[int] = None,
+                chunk_size: int = 1 << 24) -> float:
+    """
+    Redacts an existing log file, line by line, over a process pool
+
+    The input is memory-mapped and split into line-aligned chunks redacted
+    in parallel; the output, written in order with large buffered writes,
+    is byte for byte filter_datum applied to every line of the file.
+
+    Args:
+        input_path (str): UTF-8 log file to redact
+        output_path (str): destination file
+        fields (Tuple[str, ...]): fields to obfuscate
+        redaction (str): string to replace the field
+        separator (str): separator of fields
+        workers (Optional[int]): worker processes, os.cpu_count() default
+        chunk_size (int): approximate bytes per chunk
+
+    Returns:
+        float: throughput in MB/s
+    """
+    start_time: float = time.perf_counter()
+    fields = tuple(fields)
+    workers = workers or os.cpu_count() or 1
+    size: int = os.path.getsize(input_path)
+    bounds: List[Tuple[int, int]] = []
+    if size:
+        with open(input_path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start: int = 0
+            while start < size:
+                end: int = mm.find(b"\n", min(start + chunk_size, size) - 1)
+                end = size if end == -1 else end + 1
+                bounds.append((start, end))
+                start = end
+
+    with open(output_path, "wb", buffering=1 << 22) as out, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque = deque()
+        for start, end in bounds:
+            pending.append(executor.submit(_redact_chunk, input_path, start,
+                                           end, fields, redaction,
+                                           separator))
+            if len(pending) >= 2 * workers:
+                out.write(pending.popleft().result())
+        while pending:
+            out.write(pending.popleft().result())
+
+    seconds: float = max(time.perf_counter() - start_time, 1e-9)
+    throughput: float = size / seconds / 1e6
+    print("redacted {} bytes in {:.2f}s ({:.1f} MB/s)".format(
+        size, seconds, throughput), file=sys.stderr)
+    return throughput
 
 
 class RedactingFormatter(logging.Formatter):
@@ -43,33 +255,865 @@ class RedactingFormatter(logging.Formatter):
     FORMAT = "[HOLBERTON] %(name)s %(levelname)s %(asctime)-15s: %(message)s"
     SEPARATOR = ";"
 
-    def __init__(self, fields: List[str]):
+    def __init__(self,
+                 fields: List[str],
+                 structured: bool = False,
+                 pseudonymizer: Optional["Pseudonymizer"] = None):
+        """
+        Args:
+            fields (List[str]): fields to obfuscate
+            structured (bool): redact key=value pairs and mappings by set
+                lookup of their keys instead of scanning with filter_datum
+            pseudonymizer (Optional[Pseudonymizer]): replace each value
+                with its keyed token instead of REDACTION
+        """
         super(RedactingFormatter, self).__init__(self.FORMAT)
-        self.fields: List[str] = fields
+        self.fields = fields
+        self.structured: bool = structured
+        self.pseudonymizer: Optional[Pseudonymizer] = pseudonymizer
+
+    @property
+    def fields(self) -> List[str]:
+        """
+        Fields to obfuscate.
+        """
+        return list(self._redaction.fields)
+
+    @fields.setter
+    def fields(self, fields: Iterable[str]) -> None:
+        """
+        Compiles the fields, then swaps them in with their matcher as one
+        attribute, so a concurrent format() sees the old or new ones.
+        """
+        self._redaction = _compile_fields(tuple(fields), self.SEPARATOR)
 
     def format(self, record: logging.LogRecord) -> str:
         """
         Filter values in incoming log records using filter_datum.
+
+        The %-style arguments are only merged here, once a handler emits
+        the record, and the redacted message is cached on the record so
+        every other handler sharing the same fields reuses it. The fields
+        and their matcher are read once, precompiled, so a PIIFieldsWatcher
+        can swap them at any time.
+        Each config redacts the original message kept by _keep_raw, never
+        the output of a formatter that ran before it.
         """
         if not record:
             return ""
 
-        record.msg = filter_datum(self.fields,
-                                  self.REDACTION,
-                                  record.msg,
-                                  self.SEPARATOR)
+        raw: str = _keep_raw(record)
+        redaction: _Redaction = self._redaction
+        key: Tuple = (redaction, self.REDACTION, self.SEPARATOR,
+                      self.structured, self.pseudonymizer)
+        cache: Optional[Dict] = getattr(record, "_redacted", None)
+        if cache is None:
+            cache = record._redacted = {}
+        message: Optional[str] = cache.get(key)
+        if message is None:
+            if self.structured:
+                message = self._redact_structured(record,
+                                                  redaction.field_set)
+            elif self.pseudonymizer is not None:
+                message = self._pseudonymize(raw, redaction.pattern)
+            elif redaction.pattern is None:
+                message = raw
+            else:
+                message = redaction.pattern.sub(
+                    r"\g<field>={}".format(self.REDACTION), raw)
+            cache[key] = message
+        record.msg, record.args = message, None
         return super().format(record)
 
+    def pseudonymize(self, message: str,
+                     fields: Optional[Tuple[str, ...]] = None) -> str:
+        """
+        Replaces each field value of the message with its keyed token.
+        """
+        redaction: _Redaction = self._redaction if fields is None else \
+            _compile_fields(tuple(fields), self.SEPARATOR)
+        return self._pseudonymize(message, redaction.pattern)
+
+    def _pseudonymize(self, message: str,
+                      pattern: Optional[Pattern]) -> str:
+        """
+        Replaces each match of the pattern with its keyed token.
+        """
+        if pattern is None:
+            return message
+        token: Callable = self.pseudonymizer.token
+        return pattern.sub(lambda match: "{}={}".format(
+            match.group("field"), token(match.group("value"))), message)
+
+    def _mask(self, value: Any) -> str:
+        """
+        Returns what replaces a PII value: REDACTION or its token.
+        """
+        if self.pseudonymizer is None:
+            return self.REDACTION
+        return self.pseudonymizer.token(str(value))
+
+    def redact_structured(self, record: logging.LogRecord,
+                          fields: Optional[Tuple[str, ...]] = None) -> str:
+        """
+        Redacts without regex: a mapping message is rendered as key=value
+        pairs, a mapping of %-style arguments has its PII values replaced,
+        and the message is split once on the separator with each key
+        looked up in the fields set.
+
+        For well-formed messages, key=value pairs whose keys are plain
+        field names, the output is the same as filter_datum.
+        """
+        redaction: _Redaction = self._redaction if fields is None else \
+            _compile_fields(tuple(fields), self.SEPARATOR)
+        return self._redact_structured(record, redaction.field_set)
+
+    def _redact_structured(self, record: logging.LogRecord,
+                           field_set: frozenset) -> str:
+        """
+        Redacts the record without regex, looking keys up in field_set.
+        """
+        mask: Callable = self._mask
+        _keep_raw(record)
+        msg: Any = record._raw_msg
+        if isinstance(msg, Mapping):
+            return "".join("{}={}{}".format(
+                key, mask(value) if key in field_set and str(value) else value,
+                self.SEPARATOR) for key, value in msg.items())
+
+        args = record._raw_args
+        masked: set = set()
+        if isinstance(args, Mapping):
+            args = dict(args)
+            for key, value in args.items():
+                if key in field_set and str(value):
+                    args[key] = mask(value)
+                    masked.add(args[key])
+        message: str = str(msg)
+        if args:
+            message = message % args
+
+        parts: List[str] = message.split(self.SEPARATOR)
+        for i, part in enumerate(parts):
+            name, equal, value = part.partition("=")
+            if value and value not in masked and name.lstrip() in field_set:
+                parts[i] = name + equal + mask(value)
+        return self.SEPARATOR.join(parts)
+
+
+class Pseudonymizer:
+    """ Deterministic keyed pseudonymization of PII values
+
+    Each value becomes a truncated HMAC-SHA256 token, so events of one user
+    stay correlated without exposing the value. Tokens are memoized in a
+    bounded LRU cache so a value seen across many records is hashed once.
+    """
+
+    def __init__(self, key: bytes, maxsize: int = 4096, length: int = 16):
+        """
+        Args:
+            key (bytes): secret HMAC key
+            maxsize (int): max values kept in the cache
+            length (int): hex characters kept from the digest
+        """
+        self._key: bytes = key
+        self.length: int = length
+        self.token: Callable[[str], str] = lru_cache(maxsize=maxsize)(
+            self._token)
+
+    def _token(self, value: str) -> str:
+        """
+        Computes the token of a value.
+        """
+        return hmac.new(self._key, value.encode("utf-8"),
+                        hashlib.sha256).hexdigest()[:self.length]
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Returns the cache hit/miss counters and its size
+        """
+        info = self.token.cache_info()
+        return {"hits": info.hits, "misses": info.misses,
+                "maxsize": info.maxsize, "size": info.currsize}
+
+
+@lru_cache(maxsize=128)
+def _field_set(fields: Tuple[str, ...]) -> frozenset:
+    """
+    Returns the fields as a set for constant time key lookups.
+    """
+    return frozenset(fields)
+
+
+class _Redaction:
+    """ Fields of a RedactingFormatter with their matcher and set, compiled
+    once and swapped in as one attribute; hashed by identity so records
+    cache their redacted message under it cheaply.
+    """
+
+    __slots__ = ("fields", "pattern", "field_set")
+
+    def __init__(self, fields: Tuple[str, ...], separator: str):
+        """
+        Args:
+            fields (Tuple[str, ...]): fields to obfuscate
+            separator (str): separator of fields
+        """
+        self.fields: Tuple[str, ...] = fields
+        self.pattern: Optional[Pattern] = compile_redaction(fields,
+                                                            separator)
+        self.field_set: frozenset = _field_set(fields)
+
+
+@lru_cache(maxsize=128)
+def _compile_fields(fields: Tuple[str, ...], separator: str) -> _Redaction:
+    """
+    Returns the shared _Redaction of the fields, so formatters with the
+    same fields also share the message cached on each record.
+    """
+    return _Redaction(fields, separator)
+
+
+def _keep_raw(record: logging.LogRecord) -> str:
+    """
+    Keeps the original msg, args and merged message on the record the
+    first time it is formatted, and returns that message.
+    """
+    try:
+        return record._raw_message
+    except AttributeError:
+        record._raw_msg, record._raw_args = record.msg, record.args
+        record._raw_message = record.getMessage()
+        return record._raw_message
+
+
+class RedactingQueueHandler(logging.handlers.QueueHandler):
+    """ Queue handler that hands raw records to a bounded in-memory queue;
+    a background worker redacts them and writes them out in batches.
+    """
+
+    POLICIES: Tuple = ("block", "drop", "sample")
+
+    def __init__(self,
+                 formatter: logging.Formatter,
+                 stream: Optional[TextIO] = None,
+                 maxsize: int = 10000,
+                 policy: str = "block",
+                 sample_rate: int = 10,
+                 batch_size: int = 256):
+        """
+        Args:
+            formatter (logging.Formatter): formatter run on the worker
+            stream (Optional[TextIO]): output stream, sys.stderr by default
+            maxsize (int): bound of the queue
+            policy (str): what to do when the queue is full: "block" the
+                caller, "drop" the record, or "sample" (block for one
+                record out of sample_rate and drop the others)
+            sample_rate (int): records kept per overflow when sampling
+            batch_size (int): max records written per stream write
+        """
+        if policy not in self.POLICIES:
+            raise ValueError("policy must be one of {}".format(self.POLICIES))
+        super().__init__(queue.Queue(maxsize))
+        self.setFormatter(formatter)
+        self.stream: TextIO = stream if stream is not None else sys.stderr
+        self.policy: str = policy
+        self.sample_rate: int = max(1, sample_rate)
+        self.batch_size: int = max(1, batch_size)
+        self.overflows: int = 0
+        self.dropped: int = 0
+        self._closed: bool = False
+        self._worker: threading.Thread = threading.Thread(
+            target=self._drain, name="user_data-redactor", daemon=True)
+        self._worker.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Snapshots the merged message, and a copy of mapping msg and args,
+        before the caller can mutate them; only the redaction is left to
+        the worker.
+        """
+        _keep_raw(record)
+        if isinstance(record._raw_msg, Mapping):
+            record._raw_msg = dict(record._raw_msg)
+        if isinstance(record._raw_args, Mapping):
+            record._raw_args = dict(record._raw_args)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Puts the record on the queue, applying the policy when it is full.
+        Called by emit() under the handler lock. Once closed the worker is
+        gone, so records are dropped instead of queued forever.
+        """
+        if self._closed:
+            self.dropped += 1
+            return
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            self.overflows += 1
+        if self.policy == "sample" and self.overflows % self.sample_rate == 0:
+            self.queue.put(record)
+        else:
+            self.dropped += 1
+
+    def _drain(self) -> None:
+        """
+        Worker loop: takes every available record, up to batch_size, and
+        writes them with a single stream write until the None sentinel.
+        """
+        while True:
+            batch: List = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write([record for record in batch if record is not None])
+            for _ in batch:
+                self.queue.task_done()
+            if any(record is None for record in batch):
+                return
+
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        """
+        Formats the records and writes them out at once.
+        """
+        lines: List[str] = []
+        for record in records:
+            try:
+                lines.append(self.format(record) + "\n")
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        try:
+            self.stream.write("".join(lines))
+            self.stream.flush()
+        except Exception:
+            self.handleError(records[-1])
+
+    def flush(self) -> None:
+        """
+        Waits until every queued record has been written.
+        """
+        if self._worker.is_alive():
+            self.queue.join()
+
+    def close(self) -> None:
+        """
+        Flushes the queue and stops the worker, logging.shutdown calls
+        it at interpreter exit.
+        """
+        with self.lock:
+            closing: bool = not self._closed
+            self._closed = True
+            if closing and self._worker.is_alive():
+                self.queue.put(None)
+        if closing:
+            self._worker.join()
+        super().close()
+
+
+class BufferedRedactingFileHandler(logging.handlers.RotatingFileHandler):
+    """ Rotating file handler buffering formatted records, flushed by size
+    or time, whose rotated segments are gzipped on a background thread.
+    """
+
+    def __init__(self,
+                 filename: str,
+                 formatter: Optional[logging.Formatter] = None,
+                 max_bytes: int = 100 << 20,
+                 backup_count: int = 5,
+                 buffer_size: int = 64 << 10,
+                 flush_interval: float = 1.0,
+                 fsync: bool = False,
+                 compress: bool = True):
+        """
+        Args:
+            filename (str): log file path
+            formatter (Optional[logging.Formatter]): RedactingFormatter of
+                PII_FIELDS by default
+            max_bytes (int): size at which the file is rotated, 0 never
+            backup_count (int): rotated segments kept
+            buffer_size (int): buffered characters triggering a flush
+            flush_interval (float): max seconds a record stays buffered
+            fsync (bool): fsync the file after every flush, trading
+                throughput for durability
+            compress (bool): gzip rotated segments in the background
+        """
+        super().__init__(filename, maxBytes=max_bytes,
+                         backupCount=backup_count, encoding="utf-8",
+                         delay=True)
+        self.setFormatter(formatter if formatter is not None
+                          else RedactingFormatter(list(PII_FIELDS)))
+        self.buffer_size: int = buffer_size
+        self.flush_interval: float = flush_interval
+        self.fsync: bool = fsync
+        self._buffer: List[str] = []
+        self._buffered: int = 0
+        self._last_flush: float = time.monotonic()
+        self._compressor: Optional[ThreadPoolExecutor] = None
+        self._compressing: Optional[Future] = None
+        if compress:
+            self._compressor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="user_data-gzip")
+            self.namer = self._gz_name
+            self.rotator = self._rotate
+        self._stopped: threading.Event = threading.Event()
+        self._flusher: threading.Thread = threading.Thread(
+            target=self._flush_periodically, name="user_data-flusher",
+            daemon=True)
+        self._flusher.start()
+
+    @staticmethod
+    def _gz_name(name: str) -> str:
+        """
+        Names rotated segments with a .gz suffix.
+        """
+        return name + ".gz"
+
+    def _rotate(self, source: str, dest: str) -> None:
+        """
+        Moves the full file aside and hands its compression to the
+        background thread, so the logging thread never gzips.
+        """
+        pending: str = dest + ".rotating"
+        os.rename(source, pending)
+        self._compressing = self._compressor.submit(self._gzip,
+                                                    pending, dest)
+
+    @staticmethod
+    def _gzip(source: str, dest: str) -> None:
+        """
+        Compresses source into dest, then removes source.
+        """
+        with open(source, "rb") as f_in, \
+                gzip.open(dest + ".tmp", "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out, 1 << 20)
+        os.replace(dest + ".tmp", dest)
+        os.remove(source)
+
+    def doRollover(self) -> None:
+        """
+        Waits for the previous segment to be compressed before shifting
+        the backups, so a slow gzip never lands on a renamed segment.
+        """
+        if self._compressing is not None:
+            self._compressing.result()
+            self._compressing = None
+        super().doRollover()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Buffers the formatted record, flushing when the buffer is full
+        or older than flush_interval.
+        """
+        try:
+            line: str = self.format(record) + self.terminator
+            self._buffer.append(line)
+            self._buffered += len(line)
+            if self._buffered >= self.buffer_size or \
+                    time.monotonic() - self._last_flush >= \
+                    self.flush_interval:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """
+        Writes the buffer with a single write, rotating first when it
+        would push the file past max_bytes.
+        """
+        self.acquire()
+        try:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return
+            data: str = "".join(self._buffer)
+            self._buffer, self._buffered = [], 0
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self.stream.tell() > 0 and \
+                    self.stream.tell() + len(data) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(data)
+            self.stream.flush()
+            if self.fsync:
+                os.fsync(self.stream.fileno())
+        finally:
+            self.release()
+
+    def _flush_periodically(self) -> None:
+        """
+        Flusher thread: writes buffered records every flush_interval even
+        when no new record comes in. The handler lock is only waited for
+        flush_interval at a time, so close() holding it (as
+        logging.shutdown does) can still join the flusher.
+        """
+        while not self._stopped.wait(self.flush_interval):
+            if not self.lock.acquire(timeout=self.flush_interval):
+                continue
+            try:
+                if self._stopped.is_set():
+                    break
+                self.flush()
+            except Exception:
+                if logging.raiseExceptions:
+                    traceback.print_exc(file=sys.stderr)
+            finally:
+                self.lock.release()
+
+    def close(self) -> None:
+        """
+        Stops the flusher, writes what is left and waits for the pending
+        compression.
+        """
+        self._stopped.set()
+        if self._flusher.is_alive() and \
+                self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self.flush()
+        super().close()
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+
+
+class RateLimitFilter(logging.Filter):
+    """ Adaptive sampling and token bucket rate limiting of records
+
+    Attached to the logger, so suppressed records are dropped before any
+    handler runs RedactingFormatter. Once per second the sampler keeps one
+    record out of incoming rate / rate, and the bucket then caps what is
+    left at rate records per second with bursts of burst records.
+    Suppressed records are counted and summarized in one WARNING line at
+    most every summary_interval seconds. A timer emits the summary once a
+    burst is over, and a pending one is flushed at exit.
+    """
+
+    SUMMARY: str = "rate limit: %d records sampled out, %d rate limited " \
+                   "in the last %.0fs"
+
+    def __init__(self,
+                 rate: float = 1000.0,
+                 burst: Optional[float] = None,
+                 summary_interval: float = 60.0):
+        """
+        Args:
+            rate (float): records per second let through
+            burst (Optional[float]): bucket capacity, rate by default
+            summary_interval (float): min seconds between summary lines
+        """
+        super().__init__()
+        self.rate: float = rate
+        self.burst: float = burst if burst is not None else rate
+        self.summary_interval: float = summary_interval
+        now: float = time.monotonic()
+        self._tokens: float = self.burst
+        self._refilled: float = now
+        self._window_start: float = now
+        self._window_count: int = 0
+        self._keep_every: int = 1
+        self._seen: int = 0
+        self._summary_start: float = now
+        self.sampled_out: int = 0
+        self.rate_limited: int = 0
+        self.total_sampled_out: int = 0
+        self.total_rate_limited: int = 0
+        self._origin: Optional[Tuple] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock: threading.Lock = threading.Lock()
+        atexit.register(self.flush_summary)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Returns whether the record is let through.
+        """
+        if getattr(record, "rate_limit_summary", False):
+            return True
+        summary: Optional[Tuple] = None
+        with self._lock:
+            now: float = time.monotonic()
+            self._window_count += 1
+            if now - self._window_start >= 1.0:
+                incoming: float = self._window_count / \
+                    (now - self._window_start)
+                self._keep_every = max(1, int(incoming // self.rate))
+                self._window_start, self._window_count = now, 0
+
+            self._seen += 1
+            keep: bool = False
+            if self._seen % self._keep_every:
+                self.sampled_out += 1
+                self.total_sampled_out += 1
+            else:
+                self._tokens = min(self.burst, self._tokens +
+                                   (now - self._refilled) * self.rate)
+                self._refilled = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    keep = True
+                else:
+                    self.rate_limited += 1
+                    self.total_rate_limited += 1
+
+            if not keep:
+                self._origin = (record.name, record.pathname, record.lineno)
+                self._schedule(now)
+            if now - self._summary_start >= self.summary_interval:
+                summary = self._summarize(now)
+
+        self._emit(summary)
+        return keep
+
+    def _summarize(self, now: float) -> Optional[Tuple]:
+        """
+        Returns the pending summary arguments, None when nothing was
+        suppressed, and starts a new summary period. Called with the lock
+        held.
+        """
+        summary: Optional[Tuple] = None
+        if self.sampled_out or self.rate_limited:
+            summary = (self.sampled_out, self.rate_limited,
+                       now - self._summary_start)
+        self.sampled_out = self.rate_limited = 0
+        self._summary_start = now
+        return summary
+
+    def _schedule(self, now: float) -> None:
+        """
+        Starts the timer emitting the summary at the end of the period,
+        unless it runs already. Called with the lock held.
+        """
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(
+            max(0.0, self._summary_start + self.summary_interval - now),
+            self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        """
+        Timer thread: emits the summary of a period no record closed, or
+        waits for the end of the current one.
+        """
+        summary: Optional[Tuple] = None
+        with self._lock:
+            self._timer = None
+            now: float = time.monotonic()
+            if now - self._summary_start >= self.summary_interval:
+                summary = self._summarize(now)
+            elif self.sampled_out or self.rate_limited:
+                self._schedule(now)
+        self._emit(summary)
+
+    def _emit(self, summary: Optional[Tuple]) -> None:
+        """
+        Logs a summary line as coming from the last suppressed record.
+        """
+        if summary is None or self._origin is None:
+            return
+        name, pathname, lineno = self._origin
+        logger: logging.Logger = logging.getLogger(name)
+        summary_record: logging.LogRecord = logger.makeRecord(
+            name, logging.WARNING, pathname, lineno, self.SUMMARY, summary,
+            None)
+        summary_record.rate_limit_summary = True
+        logger.handle(summary_record)
+
+    def flush_summary(self) -> None:
+        """
+        Emits the pending summary right away, e.g. before the filter is
+        removed; called at exit.
+        """
+        with self._lock:
+            summary: Optional[Tuple] = self._summarize(time.monotonic())
+        self._emit(summary)
+
+
+def load_pii_fields(path: str) -> Tuple[str, ...]:
+    """
+    Reads PII field names from a file, one per line or comma separated,
+    ignoring blank lines and # comments
+
+    Args:
+        path (str): configuration file
+
+    Returns:
+        Tuple[str, ...]: field names, in file order
+    """
+    fields: List[str] = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            fields += [name.strip() for name in line.split(",")
+                       if name.strip()]
+    return tuple(fields)
+
+
+class PIIFieldsWatcher:
+    """ Hot-reloads PII fields from a file into live RedactingFormatters
+
+    A background thread polls the file; on change it loads the fields,
+    compiles their matchers ahead of time, then swaps them into every
+    formatter with a single attribute assignment, so the logging path
+    never takes a lock nor compiles anything. PII_FIELDS are always
+    redacted, and a file listing no field (e.g. truncated while being
+    rewritten) is refused, keeping the previous fields.
+    """
+
+    def __init__(self,
+                 path: str,
+                 formatters: Iterable[RedactingFormatter] = (),
+                 interval: float = 1.0):
+        """
+        Args:
+            path (str): PII fields file, see load_pii_fields
+            formatters (Iterable[RedactingFormatter]): formatters to update
+            interval (float): seconds between two checks of the file
+        """
+        self.path: str = path
+        self.interval: float = interval
+        self.formatters: List[RedactingFormatter] = list(formatters)
+        self.fields: Tuple[str, ...] = ()
+        self._signature: Optional[Tuple] = None
+        self._stopped: threading.Event = threading.Event()
+        self.reload()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._watch, name="user_data-pii-watcher", daemon=True)
+        self._thread.start()
+
+    def add(self, formatter: RedactingFormatter) -> None:
+        """
+        Registers a formatter and gives it the current fields.
+        """
+        formatter.fields = self.fields
+        self.formatters.append(formatter)
+
+    def reload(self) -> bool:
+        """
+        Loads the file when it changed since the last load.
+
+        Returns:
+            bool: True when new fields were swapped in
+
+        Raises:
+            ValueError: the file lists no field, the previous fields stay
+        """
+        stat: os.stat_result = os.stat(self.path)
+        signature: Tuple = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        fields: Tuple[str, ...] = load_pii_fields(self.path)
+        if not fields:
+            self._signature = signature
+            raise ValueError("{} lists no PII field, keeping {}".format(
+                self.path, ", ".join(self.fields or PII_FIELDS)))
+        fields = tuple(dict.fromkeys(fields + PII_FIELDS))
+        for formatter in list(self.formatters):
+            formatter.fields = fields
+        self.fields, self._signature = fields, signature
+        return True
+
+    def _watch(self) -> None:
+        """
+        Watcher thread: keeps the previous fields when the file is
+        missing or unreadable, and reports a file listing no field.
+        """
+        while not self._stopped.wait(self.interval):
+            try:
+                self.reload()
+            except (OSError, UnicodeDecodeError):
+                continue
+            except ValueError:
+                if logging.raiseExceptions:
+                    traceback.print_exc(file=sys.stderr)
+
+    def stop(self) -> None:
+        """
+        Stops watching the file.
+        """
+        self._stopped.set()
+        self._thread.join()
+
+
+def _watch_pii_fields(logger_obj: logging.Logger,
+                      fields_file: str,
+                      formatter: RedactingFormatter) -> PIIFieldsWatcher:
+    """
+    Registers the formatter on the one PIIFieldsWatcher of the logger,
+    started on first use and restarted when the fields file changes.
+    Formatters of handlers no longer on the logger are let go.
+    """
+    watcher: Optional[PIIFieldsWatcher] = getattr(
+        logger_obj, "_pii_watcher", None)
+    kept: List[RedactingFormatter] = []
+    if watcher is not None:
+        kept = [f for f in watcher.formatters if any(
+            f is handler.formatter for handler in logger_obj.handlers)]
+        if watcher.path != fields_file:
+            watcher.stop()
+            watcher = None
+    if watcher is None:
+        watcher = PIIFieldsWatcher(fields_file, kept + [formatter])
+        logger_obj._pii_watcher = watcher
+    else:
+        watcher.formatters = kept
+        watcher.add(formatter)
+    return watcher
+
 
-def get_logger() -> logging.Logger:
+def get_logger(queued: bool = False,
+               maxsize: int = 10000,
+               policy: str = "block",
+               filename: Optional[str] = None,
+               rate_limit: Optional[float] = None,
+               fields_file: Optional[str] = None) -> logging.Logger:
     """
     Returns a logging.Logger object
+
+    Args:
+        queued (bool): redact and write records on a background worker
+            instead of the calling thread
+        maxsize (int): bound of the queue when queued
+        policy (str): full queue policy when queued, "block", "drop"
+            or "sample"
+        filename (Optional[str]): write to this file through a
+            BufferedRedactingFileHandler instead of stderr
+        rate_limit (Optional[float]): sample and rate limit records to
+            this many per second before they are redacted
+        fields_file (Optional[str]): hot-reload the PII fields from this
+            file, PERSONAL_DATA_PII_FIELDS_FILE by default, instead of
+            using PII_FIELDS
     """
     logger_obj: logging.Logger = logging.getLogger(name="user_data")
     logger_obj.setLevel(logging.INFO)
     logger_obj.propagate = False
-    handler: logging.StreamHandler = logging.StreamHandler()
-    handler.setFormatter(RedactingFormatter(list(PII_FIELDS)))
+    if rate_limit is not None and not any(
+            isinstance(f, RateLimitFilter) for f in logger_obj.filters):
+        logger_obj.addFilter(RateLimitFilter(rate_limit))
+    formatter: RedactingFormatter = RedactingFormatter(list(PII_FIELDS))
+    fields_file = fields_file or os.environ.get(
+        "PERSONAL_DATA_PII_FIELDS_FILE")
+    if fields_file:
+        _watch_pii_fields(logger_obj, fields_file, formatter)
+    handler: logging.Handler
+    if queued:
+        handler = RedactingQueueHandler(formatter, maxsize=maxsize,
+                                        policy=policy)
+    elif filename is not None:
+        handler = BufferedRedactingFileHandler(filename, formatter)
+    else:
+        handler = logging.StreamHandler()
+        handler.setFormatter(formatter)
     logger_obj.addHandler(handler)
     return logger_obj
 
@@ -88,20 +1132,382 @@ def get_db() -> MySQLConnection:
                            database=database)
 
 
-def main() -> None:
-    """Main entry"""
+class ConnectionPool:
+    """ Pool reusing database connections across checkouts
+
+    Settings default to the PERSONAL_DATA_DB_POOL_SIZE,
+    PERSONAL_DATA_DB_POOL_IDLE_TIMEOUT and PERSONAL_DATA_DB_POOL_PING_INTERVAL
+    environment variables, next to the PERSONAL_DATA_DB_* ones of get_db.
+    """
+
+    def __init__(self,
+                 connect: Optional[Callable] = None,
+                 size: Optional[int] = None,
+                 idle_timeout: Optional[float] = None,
+                 ping_interval: Optional[float] = None):
+        """
+        Args:
+            connect (Optional[Callable]): connection factory, get_db default
+            size (Optional[int]): max open connections, 5 by default
+            idle_timeout (Optional[float]): seconds before an idle
+                connection is closed, 300 by default
+            ping_interval (Optional[float]): seconds of idleness after which
+                a connection is health checked on checkout, 30 by default
+        """
+        env = os.environ.get
+        self._connect: Callable = connect if connect is not None else get_db
+        self.size: int = size if size is not None else \
+            int(env("PERSONAL_DATA_DB_POOL_SIZE", 5))
+        self.idle_timeout: float = idle_timeout \
+            if idle_timeout is not None else \
+            float(env("PERSONAL_DATA_DB_POOL_IDLE_TIMEOUT", 300))
+        self.ping_interval: float = ping_interval \
+            if ping_interval is not None else \
+            float(env("PERSONAL_DATA_DB_POOL_PING_INTERVAL", 30))
+        self._idle: List[Tuple[Any, float]] = []
+        self._open: int = 0
+        self._cond: threading.Condition = threading.Condition()
+        self.in_use: int = 0
+        self.checkouts: int = 0
+        self.wait_time: float = 0.0
+        self.max_wait_time: float = 0.0
+
+    def _expire(self, now: float) -> None:
+        """
+        Closes the connections idle for longer than idle_timeout.
+        Called with the pool lock held.
+        """
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.pop(0)
+            self._open -= 1
+            self._discard(conn)
+
+    @staticmethod
+    def _discard(conn: Any) -> None:
+        """
+        Closes a connection, ignoring errors of already broken ones.
+        """
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _healthy(conn: Any) -> bool:
+        """
+        Health check: the connection can still run a query.
+        """
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """
+        Checks a connection out, opening one while below size and waiting
+        for a release otherwise.
+
+        Raises:
+            TimeoutError: no connection was released within timeout
+        """
+        start: float = time.monotonic()
+        with self._cond:
+            while True:
+                now: float = time.monotonic()
+                self._expire(now)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn, last_used = None, now
+                    break
+                remaining: Optional[float] = None if timeout is None \
+                    else timeout - (now - start)
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("no database connection available")
+                self._cond.wait(remaining)
+            waited: float = now - start
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+
+        try:
+            if conn is not None and now - last_used >= self.ping_interval \
+                    and not self._healthy(conn):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self.in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def release(self, conn: Any, broken: bool = False) -> None:
+        """
+        Returns a connection to the pool, or closes it when broken. Its
+        open transaction, if any, is rolled back first so the next
+        borrower starts afresh; a connection failing to roll back is
+        closed as broken.
+        """
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        with self._cond:
+            self.in_use -= 1
+            if broken:
+                self._open -= 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Context manager checking a connection out and back in; what the
+        block did not commit is rolled back on release.
+        """
+        conn: Any = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the pool metrics
+        """
+        with self._cond:
+            return {"size": self.size,
+                    "open": self._open,
+                    "idle": len(self._idle),
+                    "in_use": self.in_use,
+                    "checkouts": self.checkouts,
+                    "wait_time": self.wait_time,
+                    "avg_wait_time": self.wait_time / (self.checkouts or 1),
+                    "max_wait_time": self.max_wait_time}
+
+    def close(self) -> None:
+        """
+        Closes every idle connection
+        """
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._open -= 1
+                self._discard(conn)
+
+
+@lru_cache(maxsize=1)
+def get_db_pool() -> ConnectionPool:
+    """
+    Returns the process wide pool of get_db connections
+    """
+    return ConnectionPool()
+
+
+def export_users(db,
+                 sink: Optional[TextIO] = None,
+                 batch_size: int = 1000,
+                 query: str = "SELECT * FROM users;") -> int:
+    """
+    Streams the users table through the redaction in batches
+
+    Rows are read batch_size at a time with fetchmany, each batch is
+    redacted at once and written to the sink with a single write, so
+    memory stays bounded whatever the size of the table.
+
+    Args:
+        db: any DB-API connection holding a users table
+        sink (Optional[TextIO]): output stream, sys.stdout by default
+        batch_size (int): rows fetched, redacted and written per batch
+        query (str): query selecting the users rows to export
+
+    Returns:
+        int: number of rows exported
+    """
+    sink = sink if sink is not None else sys.stdout
+    pattern: Optional[Pattern] = compile_redaction(
+        PII_FIELDS, RedactingFormatter.SEPARATOR)
+    template: str = r"\g<field>={}".format(RedactingFormatter.REDACTION)
+    cursor = db.cursor()
+    cursor.execute(query)
+    count: int = 0
+    try:
+        while True:
+            rows: List = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            sink.write("".join(pattern.sub(template,
+                                           MESSAGE % tuple(row[:8])) + "\n"
+                               for row in rows))
+            count += len(rows)
+        sink.flush()
+    finally:
+        cursor.close()
+    return count
+
+
+def _export_partition(connect: Callable,
+                      key: Tuple[str, ...],
+                      offset: int,
+                      limit: int,
+                      path: str,
+                      batch_size: int) -> Tuple[int, float]:
+    """
+    Process pool worker: exports one offset range of the users table,
+    ordered by key, to its own file through its own connection
+
+    Returns:
+        Tuple[int, float]: rows exported and seconds spent
+    """
+    start: float = time.perf_counter()
+    db = connect()
+    try:
+        with open(path, "w") as sink:
+            rows: int = export_users(
+                db, sink, batch_size,
+                "SELECT * FROM users ORDER BY {} LIMIT {} OFFSET {};".format(
+                    ", ".join(key), int(limit), int(offset)))
+    finally:
+        db.close()
+    return rows, time.perf_counter() - start
+
+
+def export_users_parallel(workers: Optional[int] = None,
+                          output_dir: Optional[str] = None,
+                          sink: Optional[TextIO] = None,
+                          batch_size: int = 1000,
+                          key: Tuple[str, ...] = USERS_COLUMNS,
+                          connect: Callable = get_db) -> List[Tuple]:
+    """
+    Exports the users table split in offset ranges over a process pool
+
+    Each worker opens its own connection with connect and writes its range
+    to users.<index>.log. With an output_dir the partition files are kept
+    there, otherwise they are merged in order into the sink.
+
+    The ranges are LIMIT/OFFSET slices of the rows ordered by key, which
+    must order them totally (every column by default, the table has no
+    primary key): on tied rows, ranges may overlap or miss some. Each
+    worker reads its own snapshot, so the table must not be written
+    during the export: rows inserted or deleted meanwhile shift the
+    ranges, and rows beyond the initial COUNT(*) are not exported.
+
+    Args:
+        workers (Optional[int]): worker processes, os.cpu_count() default
+        output_dir (Optional[str]): directory keeping per-partition files
+        sink (Optional[TextIO]): merge output stream, sys.stdout by default
+        batch_size (int): rows per batch in each worker
+        key (Tuple[str, ...]): columns totally ordering the rows so
+            ranges do not overlap, a unique column or all of them
+        connect (Callable): picklable connection factory, get_db default
+
+    Returns:
+        List[Tuple]: (rows, seconds, rows/sec) per partition
+    """
+    key = (key,) if isinstance(key, str) else tuple(key)
+    if not key or not all(column.isidentifier() for column in key):
+        raise ValueError("invalid key columns: {}".format(key))
+    workers = workers or os.cpu_count() or 1
+    db = connect()
+    try:
+        cursor = db.cursor()
+        cursor.execute("SELECT COUNT(*) FROM users;")
+        total: int = cursor.fetchone()[0]
+        cursor.close()
+    finally:
+        db.close()
+    size: int = max(1, -(-total // workers))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory: str = output_dir if output_dir is not None else tmp_dir
+        paths: List[str] = [os.path.join(directory,
+                                         "users.{}.log".format(index))
+                            for index in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures: List = [executor.submit(_export_partition, connect,
+                                             key, index * size, size,
+                                             paths[index], batch_size)
+                             for index in range(workers)]
+            results: List[Tuple] = []
+            for index, future in enumerate(futures):
+                rows, seconds = future.result()
+                seconds = max(seconds, 1e-9)
+                results.append((rows, seconds, rows / seconds))
+                print("partition {}: {} rows in {:.2f}s ({:.0f} rows/s)"
+                      .format(index, rows, seconds, rows / seconds),
+                      file=sys.stderr)
+        if output_dir is None:
+            sink = sink if sink is not None else sys.stdout
+            for path in paths:
+                with open(path) as partition:
+                    shutil.copyfileobj(partition, sink)
+            sink.flush()
+    return results
+
+
+def main(export: bool = False,
+         batch_size: int = 1000,
+         workers: int = 0,
+         output_dir: Optional[str] = None) -> None:
+    """Main entry
+
+    Args:
+        export (bool): stream redacted rows to stdout in batches instead
+            of logging them one by one
+        batch_size (int): rows per batch in export mode
+        workers (int): export over this many processes when above 0
+        output_dir (Optional[str]): keep per-partition files there
+    """
+    if workers > 0:
+        export_users_parallel(workers, output_dir, batch_size=batch_size)
+        return
     db: MySQLConnection = get_db()
+    if export:
+        export_users(db, batch_size=batch_size)
+        db.close()
+        return
     cursor = db.cursor()
     cursor.execute("SELECT * FROM users;")
     logger: logging.Logger = get_logger()
-    MESSAGE: str = "name={}; email={}; phone={}; ssn={}; password={}; ip={}; \
-                    last_login={}; user_agent={};"
     for row in cursor:
-        logger.info(MESSAGE.format(row[0], row[1], row[2], row[3], row[4],
-                                   row[5], row[6], row[7]))
+        logger.info(MESSAGE, row[0], row[1], row[2], row[3], row[4],
+                    row[5], row[6], row[7])
     cursor.close()
     db.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Log the users table "
+                                     "with PII fields redacted")
+    parser.add_argument("--redact", nargs=2, metavar=("INPUT", "OUTPUT"),
+                        help="redact an existing log file instead")
+    parser.add_argument("--chunk-size", type=int, default=1 << 24,
+                        help="bytes per chunk with --redact")
+    parser.add_argument("--export", action="store_true",
+                        help="stream rows in batches instead of logging")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="export key ranges or redact chunks over "
+                        "worker processes")
+    parser.add_argument("--output-dir",
+                        help="write one file per partition in this directory")
+    args = parser.parse_args()
+    if args.redact:
+        redact_file(args.redact[0], args.redact[1], workers=args.workers,
+                    chunk_size=args.chunk_size)
+    else:
+        main(args.export, args.batch_size, args.workers, args.output_dir)
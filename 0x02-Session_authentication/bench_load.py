@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+""" Startup benchmark of User.load_from_file: eager against lazy loading
+(BASE_LAZY_LOAD=1) of a class file of 10k, 100k and 1M users, reporting
+the load time, the peak memory of the process and the first get and
+search once loaded
+
+Usage: ./bench_load.py [users ...]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+
+def make_file(count: int):
+    """ Write a .db_User.json of count users in the current directory
+    """
+    with open(".db_User.json", 'w') as f:
+        f.write("{")
+        for i in range(count):
+            obj_id = str(uuid.uuid4())
+            f.write("{}{}: {}".format(", " if i else "", json.dumps(obj_id),
+                                      json.dumps({
+                                          "id": obj_id,
+                                          "created_at": "2024-01-01T00:00:00",
+                                          "updated_at": "2024-01-01T00:00:00",
+                                          "email": "user{}@hbtn.io".format(i),
+                                          "_password": "0" * 64,
+                                          "first_name": "First{}".format(i),
+                                          "last_name": "Last{}".format(i)})))
+        f.write("}")
+
+
+def child():
+    """ Load the file of the current directory, print the measures as JSON
+    """
+    from models.user import User
+    start = time.perf_counter()
+    User.load_from_file()
+    loaded = time.perf_counter()
+    count = User.count()
+    user = User.search({"email": "user{}@hbtn.io".format(count // 2)})[0]
+    searched = time.perf_counter()
+    assert User.get(user.id) is user
+    print(json.dumps({
+        "count": count,
+        "load_s": loaded - start,
+        "first_search_ms": (searched - loaded) * 1000,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--child"]:
+        child()
+        sys.exit(0)
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    os.chdir(tempfile.mkdtemp())
+    print("{:>9} {:>6} {:>10} {:>16} {:>10}".format(
+        "users", "mode", "load s", "first search ms", "peak MB"))
+    for size in sizes:
+        make_file(size)
+        for mode, lazy in (("eager", "0"), ("lazy", "1")):
+            env = dict(os.environ, BASE_LAZY_LOAD=lazy, BASE_STORAGE="json")
+            out = subprocess.run([sys.executable, os.path.abspath(__file__),
+                                  "--child"], env=env, check=True,
+                                 capture_output=True, text=True).stdout
+            result = json.loads(out)
+            print("{:>9} {:>6} {:>10.2f} {:>16.2f} {:>10.1f}".format(
+                result["count"], mode, result["load_s"],
+                result["first_search_ms"], result["peak_mb"]))
+        os.remove(".db_User.json")
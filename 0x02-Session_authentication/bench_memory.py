@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Memory benchmark of loaded users: bytes per user of DATA holding the
+former layout (instance __dict__, a datetime per timestamp, unshared
+id strings) against the slotted User, at 1M users by default
+
+Usage: ./bench_memory.py [users ...]
+"""
+import json
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from models.base import TIMESTAMP_FORMAT
+from models.user import User
+
+
+class DictUser():
+    """ User as laid out before the slotted models
+    """
+
+    def __init__(self, **kwargs: dict):
+        """ Initialize a DictUser instance
+        """
+        self.id = kwargs.get('id', str(uuid.uuid4()))
+        self.created_at = datetime.fromisoformat(kwargs.get('created_at'))
+        self.updated_at = datetime.fromisoformat(kwargs.get('updated_at'))
+        self.email = kwargs.get('email')
+        self._password = kwargs.get('_password')
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+
+
+def records(count: int):
+    """ Yield the {id: record} JSON text of count users, a second apart
+    """
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        obj_id = str(uuid.uuid4())
+        stamp = (start + timedelta(seconds=i)).strftime(TIMESTAMP_FORMAT)
+        yield json.dumps({obj_id: {
+            "id": obj_id, "created_at": stamp, "updated_at": stamp,
+            "email": "user{}@hbtn.io".format(i), "_password": "0" * 64,
+            "first_name": "First{}".format(i), "last_name": "Last{}".format(i)
+        }})
+
+
+def bytes_per_user(cls, count: int) -> float:
+    """ Traced bytes per user of a DATA like dict of count cls objects,
+    each built from its freshly parsed record as load_from_file does
+    """
+    sources = list(records(count))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = {}
+    for text in sources:
+        (obj_id, obj_json), = json.loads(text).items()
+        data[sys.intern(obj_id) if cls is User else obj_id] = cls(**obj_json)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / count
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1000000]
+    print("{:>9} {:>14} {:>14}".format("users", "before B/user",
+                                       "after B/user"))
+    for size in sizes:
+        print("{:>9} {:>14.1f} {:>14.1f}".format(
+            size, bytes_per_user(DictUser, size), bytes_per_user(User, size)))
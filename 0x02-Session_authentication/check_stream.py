@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+""" Chunk boundary check of the streaming class file parser: every object
+is parsed at every chunk size from 1 character up, so that each value,
+float and exponent is cut at each of its characters, and must give back
+what json.loads gives
+
+Usage: ./check_stream.py [max chunk size]
+"""
+import io
+import json
+import sys
+
+from models.base import _iter_json_object
+
+
+CASES = [
+    '{}',
+    '{"a": 1.5}',
+    '{"a": 12345, "b": -0.25e-10}',
+    '{"a": 1E+3 , "b" :2.0e7}',
+    '{ "a" : [1.5, 2.25] , "b" : {"c": 3.125} }',
+    '{"a": "1.5, }", "b": true, "c": null, "d": false}',
+    '{"a": {"id": "a", "created_at": "2024-01-01T00:00:00", "n": 0.1}}',
+]
+
+
+def check(text: str, chunk_size: int):
+    """ Parse text chunk_size characters at a time against json.loads
+    """
+    pairs = _iter_json_object(io.StringIO(text), chunk_size)
+    parsed = {key: value for key, _, value in pairs}
+    assert parsed == json.loads(text), (text, chunk_size, parsed)
+    for key, raw, value in _iter_json_object(io.StringIO(text), chunk_size):
+        assert json.loads(raw) == value, (text, chunk_size, raw)
+
+
+if __name__ == "__main__":
+    sizes = range(1, int(sys.argv[1]) + 1 if sys.argv[1:] else 33)
+    for text in CASES:
+        for size in sizes:
+            check(text, size)
+    for bad in ('{"a": 1.5', '{"a": 1.', '{"a" 1}', '{"a": 1,}'):
+        for size in sizes:
+            try:
+                check(bad, size)
+            except ValueError:
+                continue
+            raise AssertionError((bad, size))
+    print("OK {} objects at chunk sizes 1-{}".format(len(CASES), sizes[-1]))
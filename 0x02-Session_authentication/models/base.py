@@ -1,21 +1,560 @@
 #!/usr/bin/env python3
 """ Base module
 """
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import datetime
 from typing import TypeVar, List, Iterable
-from os import path
+from os import getenv, path
+import atexit
+import fcntl
 import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+STORAGE = getenv("BASE_STORAGE", "json")
+SQLITE_PATH = getenv("BASE_SQLITE_PATH", ".db.sqlite3")
+JOURNAL_COMPACT_THRESHOLD = int(getenv("BASE_JOURNAL_COMPACT_THRESHOLD",
+                                       1000))
+JOURNAL_LOCKS = {}
+JOURNAL_SIZES = {}
+JOURNAL_CHECKED = set()
+WRITE_BEHIND = float(getenv("BASE_WRITE_BEHIND", 0))
+WRITE_BEHIND_MAX_DIRTY = int(getenv("BASE_WRITE_BEHIND_MAX_DIRTY", 100))
+DIRTY = {}
+DIRTY_LOCK = threading.Lock()
+FLUSH_LOCK = threading.Lock()
+FLUSH_EVENT = threading.Event()
+FLUSHER = None
+INDEX = {}
+INDEXED = {}
+LOCKS = {}
+FILE_LOCKS = {}
+MULTIPROCESS = getenv("BASE_MULTIPROCESS", "0") == "1" and \
+    STORAGE == "json"
+SIGNATURES = {}
+SEEN = {}
+LAZY_LOAD = getenv("BASE_LAZY_LOAD", "0") == "1" and not MULTIPROCESS
+HYDRATE_LOCK = threading.Lock()
+WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+
+class ReadWriteLock():
+    """ Lock letting many readers in at once, or a single writer
+
+    Waiting writers hold new readers back so they are never starved.
+    Not reentrant.
+    """
+
+    def __init__(self):
+        """ Initialize a ReadWriteLock instance
+        """
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        """ Hold the lock shared
+        """
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """ Hold the lock exclusively
+        """
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+def _signature(file_path: str, fd: int = None) -> tuple:
+    """ Cheap change marker of a class file: every snapshot write renames a
+    new inode over the path, so (inode, mtime, size) moves on each write
+    """
+    try:
+        stat = os.fstat(fd) if fd is not None else os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _write_snapshot(file_path: str, objs_json: dict):
+    """ Write a class file through a synced temp file renamed over it, so
+    readers and crashes only ever see a complete file
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=file_path + ".",
+                                    dir=path.dirname(file_path) or ".")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(objs_json, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp(value: str) -> datetime:
+    """ datetime of a TIMESTAMP_FORMAT string, through the much faster
+    fromisoformat when it is in the ISO form TIMESTAMP_FORMAT writes.
+    Cached, so the records of a same second share one datetime
+    """
+    if len(value) == 19 and value[10] == "T":
+        return datetime.fromisoformat(value)
+    return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def _to_record(obj) -> dict:
+    """ JSON dictionary to store of a DATA value, an object or the raw
+    JSON text of a record lazy loading has not built yet
+    """
+    if isinstance(obj, str):
+        return json.loads(obj)
+    return obj.to_json(True)
+
+
+def _iter_json_object(f, chunk_size: int = 1 << 16):
+    """ Stream the (key, value text, value) of the top-level JSON object
+    of the file f, reading it chunk_size characters at a time
+    """
+    scan = json.JSONDecoder().scan_once
+    buf, pos, step, key = "", 0, "{", None
+    while True:
+        try:
+            if buf[pos] in " \t\r\n":
+                pos = WHITESPACE.match(buf, pos).end()
+            char = buf[pos]
+            if char == "}" and step in ("key", ","):
+                return
+            if step in ("{", ":", ","):
+                if char != step:
+                    raise ValueError("Expecting '{}' at {}".format(step, pos))
+                step = {"{": "key", ":": "value", ",": "key"}[step]
+                pos += 1
+                continue
+            value, end = scan(buf, pos)
+            after = WHITESPACE.match(buf, end).end()
+            if buf[after] not in (":" if step == "key" else ",}"):
+                raise ValueError("Value cut at the end of the buffer")
+        except (IndexError, StopIteration, ValueError) as e:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError("Truncated or invalid JSON object") from e
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        if step == "key":
+            key, step = value, ":"
+        else:
+            yield key, buf[pos:end], value
+            step = ","
+        pos = end
+
+
+def _cut_torn_line(file_path: str):
+    """ Truncate a journal after its last newline, dropping the half
+    written record of a crash so the next append starts on a fresh line
+    """
+    try:
+        f = open(file_path, 'rb+')
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 4096)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            f.truncate(position)
+
+
+def flush():
+    """ Write every class marked dirty by write-behind saves
+    """
+    with FLUSH_LOCK:
+        with DIRTY_LOCK:
+            dirty = list(DIRTY.values())
+            DIRTY.clear()
+        for cls, _ in dirty:
+            cls.save_to_file()
+
+
+def _flush_periodically():
+    """ Write-behind flusher: writes the dirty classes every WRITE_BEHIND
+    seconds, or as soon as one has WRITE_BEHIND_MAX_DIRTY pending changes
+    """
+    while True:
+        FLUSH_EVENT.wait(WRITE_BEHIND)
+        FLUSH_EVENT.clear()
+        flush()
+
+
+atexit.register(flush)
+
+
+class Storage(ABC):
+    """ Storage backend of Base, selected by BASE_STORAGE
+
+    Base keeps every object in DATA and tells the backend which object
+    changed, the backend persists the state that object has in DATA then.
+    """
+
+    @abstractmethod
+    def load(self, cls) -> dict:
+        """ Return the stored objects of cls as {id: JSON dictionary}
+        """
+
+    def iter_raw(self, cls):
+        """ Yield the (id, JSON text, JSON dictionary or None) of the stored
+        objects of cls, for lazy loading
+        """
+        for obj_id, obj_json in self.load(cls).items():
+            yield obj_id, json.dumps(obj_json), obj_json
+
+    @abstractmethod
+    def write(self, cls, obj_id: str):
+        """ Persist the object obj_id of cls as it is in DATA now, or its
+        removal when it is no longer there
+        """
+
+    @abstractmethod
+    def save_all(self, cls):
+        """ Persist every object of cls
+        """
+
+
+class JSONStorage(Storage):
+    """ One JSON file per class, rewritten on each change
+    """
+
+    def load(self, cls) -> dict:
+        """ Read the class file
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        SEEN[s_class], SIGNATURES[s_class] = {}, None
+        if not path.exists(file_path):
+            return {}
+        with open(file_path, 'r') as f:
+            objs_json = json.load(f)
+            SIGNATURES[s_class] = _signature(file_path, f.fileno())
+        SEEN[s_class] = objs_json
+        return objs_json
+
+    def iter_raw(self, cls):
+        """ Stream the records of the class file without loading it whole
+        """
+        file_path = ".db_{}.json".format(cls.__name__)
+        if not path.exists(file_path):
+            return
+        with open(file_path, 'r') as f:
+            yield from _iter_json_object(f)
+
+    def write(self, cls, obj_id: str):
+        """ Save the class file, or with BASE_WRITE_BEHIND set, only mark
+        it dirty for the flusher so bursts of changes coalesce in one write
+        """
+        global FLUSHER
+        if WRITE_BEHIND <= 0:
+            cls.save_to_file()
+            return
+        s_class = cls.__name__
+        with DIRTY_LOCK:
+            count = DIRTY.get(s_class, (cls, 0))[1] + 1
+            DIRTY[s_class] = (cls, count)
+            if FLUSHER is None:
+                FLUSHER = threading.Thread(target=_flush_periodically,
+                                           daemon=True)
+                FLUSHER.start()
+        if count >= WRITE_BEHIND_MAX_DIRTY:
+            FLUSH_EVENT.set()
+
+    def save_all(self, cls):
+        """ Rewrite the class file
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        with cls._file_lock():
+            objs_json = {}
+            with cls._lock().read():
+                for obj_id, obj in DATA[s_class].items():
+                    objs_json[obj_id] = _to_record(obj)
+            _write_snapshot(file_path, objs_json)
+
+
+class JournalStorage(JSONStorage):
+    """ The class file as a snapshot plus an append-only journal of the
+    changes since, folded into the snapshot in the background
+    """
+
+    def load(self, cls) -> dict:
+        """ Read the snapshot and replay the journal on top of it. A set
+        aside journal left by a crash during compaction is folded into a
+        new snapshot and dropped. Called with the file lock held
+        """
+        objs_json = dict(super().load(cls))
+        JOURNAL_SIZES[cls.__name__] = 0
+        _cut_torn_line(self._path(cls))
+        JOURNAL_CHECKED.add(cls.__name__)
+        compacting = self._path(cls) + ".compacting"
+        for journal in (compacting, self._path(cls)):
+            self._replay(cls, journal, objs_json)
+        if path.exists(compacting):
+            _write_snapshot(".db_{}.json".format(cls.__name__), objs_json)
+            os.remove(compacting)
+        return objs_json
+
+    def iter_raw(self, cls):
+        """ Records of the snapshot with the journal replayed
+        """
+        return Storage.iter_raw(self, cls)
+
+    def write(self, cls, obj_id: str):
+        """ Append one record to the journal, compacting in the background
+        once the journal holds JOURNAL_COMPACT_THRESHOLD records
+        """
+        s_class = cls.__name__
+        with JOURNAL_LOCKS.setdefault(s_class, threading.Lock()):
+            with cls._lock().read():
+                obj = DATA[s_class].get(obj_id)
+                if obj is None:
+                    entry = {"op": "remove", "id": obj_id}
+                else:
+                    entry = {"op": "save", "id": obj_id,
+                             "obj": _to_record(obj)}
+            if s_class not in JOURNAL_CHECKED:
+                _cut_torn_line(self._path(cls))
+                JOURNAL_CHECKED.add(s_class)
+            with open(self._path(cls), 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+            JOURNAL_SIZES[s_class] = JOURNAL_SIZES.get(s_class, 0) + 1
+            if JOURNAL_SIZES[s_class] < JOURNAL_COMPACT_THRESHOLD or \
+                    path.exists(self._path(cls) + ".compacting"):
+                return
+            os.replace(self._path(cls), self._path(cls) + ".compacting")
+            inode = os.stat(self._path(cls) + ".compacting").st_ino
+            JOURNAL_SIZES[s_class] = 0
+            with cls._lock().read():
+                objs = list(DATA[s_class].items())
+        threading.Thread(target=self._compact, args=(cls, objs, inode),
+                         daemon=True).start()
+
+    def save_all(self, cls):
+        """ Rewrite the snapshot and drop the journals it supersedes, with
+        the appends held off so none is lost in between
+        """
+        s_class = cls.__name__
+        with JOURNAL_LOCKS.setdefault(s_class, threading.Lock()):
+            super().save_all(cls)
+            for journal in (self._path(cls), self._path(cls) + ".compacting"):
+                if path.exists(journal):
+                    os.remove(journal)
+            JOURNAL_SIZES[s_class] = 0
+
+    def _path(self, cls) -> str:
+        """ Path of the journal of the class
+        """
+        return ".db_{}.journal".format(cls.__name__)
+
+    def _replay(self, cls, journal: str, objs_json: dict):
+        """ Apply the records of a journal file to objs_json, skipping a
+        line that does not parse (half written by a crash)
+        """
+        s_class = cls.__name__
+        if not path.exists(journal):
+            return
+        with open(journal, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if entry["op"] == "save":
+                        objs_json[entry["id"]] = entry["obj"]
+                    else:
+                        objs_json.pop(entry["id"], None)
+                except (ValueError, TypeError, KeyError):
+                    continue
+                JOURNAL_SIZES[s_class] = JOURNAL_SIZES.get(s_class, 0) + 1
+
+    def _compact(self, cls, objs: list, inode: int):
+        """ Rewrite the snapshot from objs, the state when the journal was
+        set aside, then drop the set aside journal, unless a load already
+        folded it (inode no longer the set aside journal)
+        """
+        file_path = ".db_{}.json".format(cls.__name__)
+        with cls._file_lock():
+            try:
+                if os.stat(self._path(cls) + ".compacting").st_ino != inode:
+                    return
+            except FileNotFoundError:
+                return
+            objs_json = {}
+            with cls._lock().read():
+                for obj_id, obj in objs:
+                    objs_json[obj_id] = _to_record(obj)
+            _write_snapshot(file_path, objs_json)
+            os.remove(self._path(cls) + ".compacting")
+
+
+class SQLiteStorage(Storage):
+    """ One table per class in the SQLite database BASE_SQLITE_PATH, a row
+    per object upserted or deleted on each change by its id primary key.
+    Persistence only: get, search and count read the in-memory objects
+    and their INDEXES, which stay ahead of the table under write-behind
+    """
+
+    def __init__(self, db_path: str = SQLITE_PATH):
+        """ Initialize a SQLiteStorage instance
+        """
+        self._db_path = db_path
+        self._local = threading.local()
+        self._tables = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        """ Connection of the calling thread, reopened after a fork
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._db_path, timeout=30,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _table(self, cls, conn: sqlite3.Connection) -> str:
+        """ Create the table of the class the first time it is used
+        """
+        s_class = cls.__name__
+        if s_class not in self._tables:
+            conn.execute('CREATE TABLE IF NOT EXISTS "{}" (id TEXT PRIMARY '
+                         'KEY, obj TEXT NOT NULL)'.format(s_class))
+            self._tables.add(s_class)
+        return s_class
+
+    def load(self, cls) -> dict:
+        """ Read every row of the class table
+        """
+        conn = self._connect()
+        table = self._table(cls, conn)
+        return {obj_id: json.loads(obj) for obj_id, obj in conn.execute(
+            'SELECT id, obj FROM "{}"'.format(table))}
+
+    def iter_raw(self, cls):
+        """ Stream the rows of the class table
+        """
+        conn = self._connect()
+        table = self._table(cls, conn)
+        for obj_id, obj in conn.execute(
+                'SELECT id, obj FROM "{}"'.format(table)):
+            yield obj_id, obj, None
+
+    def write(self, cls, obj_id: str):
+        """ Upsert or delete the row of obj_id
+        """
+        s_class = cls.__name__
+        conn = self._connect()
+        table = self._table(cls, conn)
+        with cls._file_lock():
+            with cls._lock().read():
+                obj = DATA[s_class].get(obj_id)
+                obj = None if obj is None else json.dumps(_to_record(obj))
+            if obj is None:
+                conn.execute('DELETE FROM "{}" WHERE id = ?'.format(table),
+                             (obj_id,))
+            else:
+                conn.execute('INSERT INTO "{}" (id, obj) VALUES (?, ?) ON '
+                             'CONFLICT(id) DO UPDATE SET obj = excluded.obj'
+                             .format(table), (obj_id, obj))
+
+    def save_all(self, cls):
+        """ Replace the rows of the class table in one transaction
+        """
+        s_class = cls.__name__
+        conn = self._connect()
+        table = self._table(cls, conn)
+        with cls._file_lock():
+            with cls._lock().read():
+                rows = [(obj_id, json.dumps(_to_record(obj)))
+                        for obj_id, obj in DATA[s_class].items()]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute('DELETE FROM "{}"'.format(table))
+                conn.executemany('INSERT INTO "{}" (id, obj) VALUES (?, ?)'
+                                 .format(table), rows)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+
+STORAGES = {
+    "json": JSONStorage,
+    "journal": JournalStorage,
+    "sqlite": SQLiteStorage,
+}
+if STORAGE not in STORAGES:
+    raise ValueError("BASE_STORAGE must be one of {}, not {}".format(
+        ", ".join(STORAGES), STORAGE))
+BACKEND = STORAGES[STORAGE]()
 
 
 class Base():
     """ Base class
+
+    Instances have no __dict__: every attribute is declared in the
+    __slots__ of its class, and FIELDS lists them all for to_json
     """
 
+    __slots__ = ("id", "created_at", "updated_at")
+    FIELDS = __slots__
+    INDEXES = ()
+
+    def __init_subclass__(cls, **kwargs: dict):
+        """ Extend FIELDS with the slots the subclass declares
+        """
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = cls.FIELDS + tuple(
+            field for field in cls.__dict__.get("__slots__", ())
+            if field not in cls.FIELDS)
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
@@ -23,17 +562,17 @@ class Base():
         if DATA.get(s_class) is None:
             DATA[s_class] = {}
 
-        self.id = kwargs.get('id', str(uuid.uuid4()))
+        obj_id = kwargs['id'] if 'id' in kwargs else str(uuid.uuid4())
+        self.id = sys.intern(obj_id) if type(obj_id) is str else obj_id
+        now = None
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self.created_at = _parse_timestamp(kwargs.get('created_at'))
         else:
-            self.created_at = datetime.utcnow()
+            self.created_at = now = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self.updated_at = _parse_timestamp(kwargs.get('updated_at'))
         else:
-            self.updated_at = datetime.utcnow()
+            self.updated_at = now or datetime.utcnow()
 
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
@@ -48,7 +587,10 @@ class Base():
         """ Convert the object a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
+        items = [(key, getattr(self, key)) for key in self.FIELDS
+                 if hasattr(self, key)]
+        items += getattr(self, "__dict__", {}).items()
+        for key, value in items:
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -57,56 +599,166 @@ class Base():
                 result[key] = value
         return result
 
+    @classmethod
+    def _lock(cls) -> ReadWriteLock:
+        """ Reader-writer lock guarding DATA and the indexes of the class
+        """
+        s_class = cls.__name__
+        lock = LOCKS.get(s_class)
+        if lock is None:
+            lock = LOCKS.setdefault(s_class, ReadWriteLock())
+        return lock
+
+    @classmethod
+    def _file_lock(cls) -> threading.Lock:
+        """ Lock ordering the snapshot writes of the class
+        """
+        return FILE_LOCKS.setdefault(cls.__name__, threading.Lock())
+
+    @classmethod
+    @contextmanager
+    def _process_lock(cls):
+        """ Exclusive lock of the class file across processes
+        """
+        with open(".db_{}.lock".format(cls.__name__), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from the storage backend
+
+        With BASE_LAZY_LOAD set, the records are streamed in and kept as
+        raw JSON text, each object is built on its first access
+        """
+        s_class = cls.__name__
+        with cls._file_lock(), cls._lock().write():
+            DATA[s_class] = {}
+            if not LAZY_LOAD:
+                for obj_id, obj_json in BACKEND.load(cls).items():
+                    DATA[s_class][sys.intern(obj_id)] = cls(**obj_json)
+                cls._reindex()
+                return
+            INDEX[s_class], INDEXED[s_class] = {}, {}
+            for obj_id, text, obj_json in BACKEND.iter_raw(cls):
+                obj_id = sys.intern(obj_id)
+                DATA[s_class][obj_id] = text
+                if cls.INDEXES:
+                    if obj_json is None:
+                        obj_json = json.loads(text)
+                    cls._index_add(obj_id, obj_json)
+
+    @classmethod
+    def save_to_file(cls):
+        """ Save all objects to the storage backend
+        """
+        BACKEND.save_all(cls)
+
+    @classmethod
+    def _sync(cls):
+        """ Bring DATA up to date with a class file written by another
+        process, rebuilding only the records that changed. Called with
+        the write lock held
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
+        if _signature(file_path) == SIGNATURES.get(s_class):
             return
-
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        objs_json, signature = {}, None
+        try:
+            with open(file_path, 'r') as f:
+                objs_json = json.load(f)
+                signature = _signature(file_path, f.fileno())
+        except FileNotFoundError:
+            pass
+        seen = SEEN.get(s_class, {})
+        data = DATA[s_class]
+        for obj_id in [i for i in data if i not in objs_json]:
+            del data[obj_id]
+            cls._index_remove(obj_id)
+        for obj_id, obj_json in objs_json.items():
+            if obj_id not in data or seen.get(obj_id) != obj_json:
+                data[sys.intern(obj_id)] = cls(**obj_json)
+                cls._index_add(obj_id, data[obj_id])
+        SEEN[s_class], SIGNATURES[s_class] = objs_json, signature
 
     @classmethod
-    def save_to_file(cls):
-        """ Save all objects to file
+    def _refresh(cls):
+        """ Multi-process mode: pick up the changes of other processes
+        before a read, a stat call when nothing changed
         """
         s_class = cls.__name__
+        if DATA.get(s_class) is None:
+            return
         file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        if _signature(file_path) != SIGNATURES.get(s_class):
+            with cls._lock().write():
+                cls._sync()
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def _write_shared(cls, obj_id: str, obj: TypeVar('Base') = None):
+        """ Multi-process mode: save obj, or remove obj_id when obj is None,
+        under the cross-process lock, merging the other processes' changes
+        first so none is overwritten
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        with cls._file_lock(), cls._process_lock(), cls._lock().write():
+            cls._sync()
+            objs_json = dict(SEEN.get(s_class, {}))
+            if obj is None:
+                if DATA[s_class].pop(obj_id, None) is None:
+                    return
+                cls._index_remove(obj_id)
+                objs_json.pop(obj_id, None)
+            else:
+                obj.updated_at = datetime.utcnow()
+                DATA[s_class][obj_id] = obj
+                cls._index_add(obj_id, obj)
+                objs_json[obj_id] = obj.to_json(True)
+            _write_snapshot(file_path, objs_json)
+            SEEN[s_class] = objs_json
+            SIGNATURES[s_class] = _signature(file_path)
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        if MULTIPROCESS:
+            self.__class__._write_shared(self.id, self)
+            return
+        with self.__class__._lock().write():
+            self.updated_at = datetime.utcnow()
+            DATA[s_class][self.id] = self
+            self.__class__._index_add(self.id, self)
+        BACKEND.write(self.__class__, self.id)
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        if MULTIPROCESS:
+            self.__class__._write_shared(self.id)
+            return
+        with self.__class__._lock().write():
+            if DATA[s_class].get(self.id) is None:
+                return
             del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+            self.__class__._index_remove(self.id)
+        BACKEND.write(self.__class__, self.id)
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
         s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        if MULTIPROCESS:
+            cls._refresh()
+        with cls._lock().read():
+            return len(DATA[s_class].keys())
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -119,13 +771,109 @@ class Base():
         """ Return one object by ID
         """
         s_class = cls.__name__
-        return DATA[s_class].get(id)
+        if MULTIPROCESS:
+            cls._refresh()
+        with cls._lock().read():
+            obj = DATA[s_class].get(id)
+            if isinstance(obj, str):
+                obj = cls._hydrate(id)
+            return obj
+
+    @classmethod
+    def _hydrate(cls, obj_id: str) -> TypeVar('Base'):
+        """ Lazy loading: build the object of a raw record in DATA, once
+        """
+        data = DATA[cls.__name__]
+        with HYDRATE_LOCK:
+            obj = data.get(obj_id)
+            if isinstance(obj, str):
+                obj = cls(**json.loads(obj))
+                data[obj_id] = obj
+        return obj
+
+    @classmethod
+    def _index_add(cls, obj_id: str, obj):
+        """ Index obj_id on every attribute of INDEXES, replacing the entries
+        of its previous save. obj is the object, or the JSON dictionary of
+        a raw record, the buckets are ordered sets of ids
+        """
+        if not cls.INDEXES:
+            return
+        s_class = cls.__name__
+        cls._index_remove(obj_id)
+        index = INDEX.setdefault(s_class, {})
+        keys = {}
+        for attr in cls.INDEXES:
+            if isinstance(obj, dict):
+                value = obj.get(attr)
+            else:
+                value = getattr(obj, attr, None)
+            try:
+                index.setdefault(attr, {}).setdefault(value, {})[obj_id] = None
+            except TypeError:
+                continue
+            keys[attr] = value
+        INDEXED.setdefault(s_class, {})[obj_id] = keys
+
+    @classmethod
+    def _index_remove(cls, obj_id: str):
+        """ Drop the index entries of an object
+        """
+        s_class = cls.__name__
+        keys = INDEXED.get(s_class, {}).pop(obj_id, None)
+        if not keys:
+            return
+        for attr, value in keys.items():
+            bucket = INDEX[s_class][attr][value]
+            bucket.pop(obj_id, None)
+            if not bucket:
+                del INDEX[s_class][attr][value]
+
+    @classmethod
+    def _reindex(cls):
+        """ Rebuild the indexes of the class from DATA
+        """
+        s_class = cls.__name__
+        INDEX[s_class] = {}
+        INDEXED[s_class] = {}
+        for obj_id, obj in list(DATA[s_class].items()):
+            cls._index_add(obj_id, obj)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+
+        Uses the index of the first attribute of INDEXES in the query,
+        scanning every object otherwise
+        """
+        if MULTIPROCESS:
+            cls._refresh()
+        with cls._lock().read():
+            return cls._search(attributes)
+
+    @classmethod
+    def _search(cls, attributes: dict) -> List[TypeVar('Base')]:
+        """ search, called with the read lock held
         """
         s_class = cls.__name__
+        data = DATA[s_class]
+        items = data.items()
+        for attr in cls.INDEXES:
+            if attr not in attributes:
+                continue
+            try:
+                ids = INDEX.get(s_class, {}).get(attr, {}).get(
+                    attributes[attr], {})
+            except TypeError:
+                continue
+            items = [(obj_id, data[obj_id]) for obj_id in ids]
+            break
+        if LAZY_LOAD:
+            objs = [cls._hydrate(obj_id) if isinstance(obj, str) else obj
+                    for obj_id, obj in items]
+        else:
+            objs = (obj for _, obj in items)
+
         def _search(obj):
             if len(attributes) == 0:
                 return True
@@ -133,5 +881,5 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        return list(filter(_search, objs))
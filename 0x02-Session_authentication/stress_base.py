@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+""" Stress test of the Base store: many threads saving, searching, getting
+and removing users at once, then checking DATA, the email index, the
+class file and a reload agree
+
+Usage: ./stress_base.py [threads] [operations per thread]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+
+os.chdir(tempfile.mkdtemp())
+from models.base import DATA, STORAGE, flush  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def worker(seed: int, operations: int, errors: list):
+    """ Random mix of save, search, get and remove
+    """
+    rand = random.Random(seed)
+    mine = []
+    try:
+        for i in range(operations):
+            op = rand.random()
+            if op < 0.4 or not mine:
+                user = User()
+                user.email = "user{}_{}@hbtn.io".format(seed, i)
+                user.password = "pwd"
+                user.save()
+                mine.append(user)
+            elif op < 0.6:
+                user = rand.choice(mine)
+                user.first_name = "name{}".format(i)
+                user.save()
+            elif op < 0.8:
+                user = rand.choice(mine)
+                found = User.search({"email": user.email})
+                assert found == [user], "search missed {}".format(user.email)
+                assert User.get(user.id) is user
+            else:
+                user = mine.pop(rand.randrange(len(mine)))
+                user.remove()
+                assert User.get(user.id) is None
+                assert User.search({"email": user.email}) == []
+            if i % 50 == 0:
+                User.all()
+                User.count()
+    except Exception as e:
+        errors.append(e)
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    User.load_from_file()
+    errors = []
+    pool = [threading.Thread(target=worker, args=(n, operations, errors))
+            for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    users = {user.id: user for user in User.all()}
+    for user in users.values():
+        assert User.search({"email": user.email}) == [user]
+    flush()
+    if STORAGE == "json":
+        with open(".db_User.json") as f:
+            assert set(json.load(f)) == set(users), "file out of sync"
+    User.load_from_file()
+    assert set(DATA["User"]) == set(users), "reload out of sync"
+    if errors:
+        print("FAILED: {}".format(errors[0]))
+        sys.exit(1)
+    print("OK: {} threads x {} operations, {} users left".format(
+        threads, operations, len(users)))